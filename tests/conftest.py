@@ -0,0 +1,69 @@
+"""Shared pytest fixtures for the Truss test suite.
+
+The Temporal *time-skipping* test environment boots an external test server,
+which costs seconds per start.  Tests that need it share one session-scoped
+environment instead of paying that boot per test.  Because the server binary
+is downloaded on first use, these fixtures (and the tests depending on them)
+are opt-in via ``TRUSS_RUN_TEMPORAL_ENV_TESTS=1``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+
+import pytest
+import pytest_asyncio
+
+# Single switch used by fixtures and skip markers alike.
+RUN_TEMPORAL_ENV_TESTS = os.getenv("TRUSS_RUN_TEMPORAL_ENV_TESTS", "0") in {"1", "true", "yes"}
+
+requires_temporal_env = pytest.mark.skipif(
+    not RUN_TEMPORAL_ENV_TESTS,
+    reason="Temporal time-skipping test server not enabled (set TRUSS_RUN_TEMPORAL_ENV_TESTS=1)",
+)
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def time_skipping_env():
+    """Session-scoped Temporal time-skipping environment shared by all tests."""
+
+    from temporalio.testing import WorkflowEnvironment  # local import – heavy dep
+
+    env = await WorkflowEnvironment.start_time_skipping()
+    try:
+        yield env
+    finally:
+        await env.shutdown()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def workflow_worker(time_skipping_env):
+    """Factory yielding one started Worker per task queue for the session.
+
+    Registering workflow/activity types on a fresh Worker per test is pure
+    overhead when the test body is tiny; workers built here stay running until
+    session teardown and are reused when a queue name repeats.
+    """
+
+    from temporalio import worker as _worker  # local import – heavy dep
+
+    from truss.workflows import TemporalAgentExecutionWorkflow
+
+    workers: dict[str, _worker.Worker] = {}
+
+    async with contextlib.AsyncExitStack() as stack:
+
+        async def _get(task_queue: str, activities) -> _worker.Worker:
+            if task_queue not in workers:
+                worker = _worker.Worker(
+                    time_skipping_env.client,
+                    task_queue=task_queue,
+                    workflows=[TemporalAgentExecutionWorkflow],
+                    activities=activities,
+                )
+                await stack.enter_async_context(worker)
+                workers[task_queue] = worker
+            return workers[task_queue]
+
+        yield _get
@@ -1,106 +1,120 @@
-# from uuid import uuid4
-
-# import pytest
-# from temporalio.testing import WorkflowEnvironment
-# from temporalio import worker as _worker
-# from temporalio import activity
-
-# from truss.data_models import (
-#     AgentWorkflowInput,
-#     Message,
-#     AgentMemory,
-#     ToolCall,
-#     ToolCallResult,
-# )
-# from truss.workflows import TemporalAgentExecutionWorkflow
-
-
-# @pytest.mark.asyncio
-# async def test_workflow_executes_tools_and_completes():
-#     """Workflow should call ExecuteTool and persist tool results before completing."""
-
-#     # In-memory trackers ------------------------------------------------------
-#     created_steps: list[Message] = []
-#     execute_tool_called: list[str] = []
-#     finalized: list[str] = []
-
-#     # ------------------------------------------------------------------
-#     # Activity stubs
-#     # ------------------------------------------------------------------
-#     @activity.defn(name="CreateRun")
-#     async def fake_create_run(session_id):
-#         return str(uuid4())
-
-#     @activity.defn(name="CreateRunStep")
-#     async def fake_create_run_step(run_id, message):
-#         created_steps.append(message)
-#         return str(uuid4())
-
-#     @activity.defn(name="GetRunMemory")
-#     async def fake_get_run_memory(session_id):
-#         # Return empty memory for simplicity – the workflow doesn't depend on
-#         # previous steps for this test scenario.
-#         return AgentMemory(messages=[Message(role="user", content="hello")])
-
-#     # Provide two-phase LLM behaviour: first call returns tool_calls, second none
-#     _llm_call_counter = {"count": 0}
-
-#     @activity.defn(name="LLMStreamPublish")
-#     async def fake_llm_stream_publish(agent_config, messages, session_id, run_id):
-#         _llm_call_counter["count"] += 1
-#         if _llm_call_counter["count"] == 1:
-#             # First iteration – ask to execute a tool
-#             tool_call = ToolCall(name="web_search", arguments={"query": "hi"})
-#             return Message(role="assistant", content=None, tool_calls=[tool_call])
-#         # Second iteration – final assistant response with no tool calls
-#         return Message(role="assistant", content="done", tool_calls=None)
-
-#     @activity.defn(name="ExecuteTool")
-#     async def fake_execute_tool(tool_call: ToolCall):
-#         execute_tool_called.append(tool_call.name)
-#         return ToolCallResult(tool_call_id=tool_call.id, content="result")
-
-#     @activity.defn(name="FinalizeRun")
-#     async def fake_finalize_run(run_id, status, error_msg):  # noqa: D401
-#         finalized.append(status)
-
-#     # ------------------------------------------------------------------
-#     env = await WorkflowEnvironment.start_time_skipping()
-#     worker = _worker.Worker(
-#         env.client,
-#         task_queue="test-tool-queue",
-#         workflows=[TemporalAgentExecutionWorkflow],
-#         activities=[
-#             fake_create_run,
-#             fake_create_run_step,
-#             fake_get_run_memory,
-#             fake_llm_stream_publish,
-#             fake_execute_tool,
-#             fake_finalize_run,
-#         ],
-#     )
-
-#     async with worker:
-#         input_payload = AgentWorkflowInput(
-#             session_id=str(uuid4()),
-#             user_message=Message(role="user", content="Hello"),
-#         )
-#         handle = await env.client.start_workflow(
-#             TemporalAgentExecutionWorkflow.execute,
-#             input_payload,
-#             id=f"wf-{uuid4()}",
-#             task_queue="test-tool-queue",
-#         )
-#         result = await handle.result()
-
-#     # Assertions --------------------------------------------------------------
-#     assert result.status == "completed"
-#     # ExecuteTool called exactly once
-#     assert execute_tool_called == ["web_search"]
-
-#     # A tool result message should have been persisted
-#     assert any(m.role == "tool" for m in created_steps)
-
-#     assert finalized == ["completed"]
-
-#     await env.shutdown() 
+from uuid import uuid4
+
+import pytest
+from temporalio import activity
+
+from truss.data_models import (
+    AgentWorkflowInput,
+    Message,
+    ToolCall,
+    ToolCallResult,
+    ToolCallText,
+)
+from truss.workflows import TemporalAgentExecutionWorkflow
+
+from tests.conftest import requires_temporal_env
+
+
+@requires_temporal_env
+@pytest.mark.asyncio(loop_scope="session")
+async def test_workflow_executes_tools_and_completes(time_skipping_env, workflow_worker):
+    """Workflow should call ExecuteTool and persist tool results before completing."""
+
+    env = time_skipping_env
+
+    # In-memory trackers ------------------------------------------------------
+    created_steps: list[Message] = []
+    execute_tool_called: list[str] = []
+    finalized: list[str] = []
+
+    # ------------------------------------------------------------------
+    # Activity stubs
+    # ------------------------------------------------------------------
+    @activity.defn(name="CreateRunWithInitialStep")
+    async def fake_create_run_with_initial_step(session_id, user_message):
+        return str(uuid4())
+
+    @activity.defn(name="CreateRunStep")
+    async def fake_create_run_step(run_id, message):
+        created_steps.append(message)
+        return str(uuid4())
+
+    @activity.defn(name="ResolveAgentConfig")
+    async def fake_resolve_agent_config(session_id):
+        return None
+
+    @activity.defn(name="GetRunMemorySince")
+    async def fake_get_run_memory_since(session_id, cursor):
+        # Return the user message on the first fetch only – the workflow keeps
+        # its own history and asks just for the tail.
+        if cursor:
+            return []
+        return [Message(role="user", content="hello")]
+
+    # Provide two-phase LLM behaviour: first call returns tool_calls, second none
+    _llm_call_counter = {"count": 0}
+
+    @activity.defn(name="LLMStreamPublish")
+    async def fake_llm_stream_publish(agent_config, messages_ref, session_id, run_id):
+        _llm_call_counter["count"] += 1
+        if _llm_call_counter["count"] == 1:
+            # First iteration – ask to execute a tool
+            tool_call = ToolCall(name="web_search", arguments={"query": "hi"})
+            return Message(role="assistant", content=None, tool_calls=[tool_call])
+        # Second iteration – final assistant response with no tool calls
+        return Message(role="assistant", content="done", tool_calls=None)
+
+    @activity.defn(name="ExecuteToolsAndPersist")
+    async def fake_execute_tools_and_persist(run_id, tool_calls):
+        results = []
+        for tool_call in tool_calls:
+            execute_tool_called.append(tool_call.name)
+            # The real activity persists the tool messages itself.
+            created_steps.append(
+                Message(role="tool", content="result", tool_call_id=tool_call.id)
+            )
+            results.append(
+                ToolCallResult(tool_call_id=tool_call.id, content=ToolCallText(value="result"))
+            )
+        return results
+
+    @activity.defn(name="FinalizeRun")
+    async def fake_finalize_run(run_id, status, error_msg):  # noqa: D401
+        finalized.append(status)
+
+    # ------------------------------------------------------------------
+    # Shared worker – stays running until session teardown.
+    await workflow_worker(
+        "test-tool-queue",
+        [
+            fake_create_run_with_initial_step,
+            fake_create_run_step,
+            fake_resolve_agent_config,
+            fake_get_run_memory_since,
+            fake_llm_stream_publish,
+            fake_execute_tools_and_persist,
+            fake_finalize_run,
+        ],
+    )
+
+    input_payload = AgentWorkflowInput(
+        session_id=str(uuid4()),
+        user_message=Message(role="user", content="Hello"),
+    )
+    handle = await env.client.start_workflow(
+        TemporalAgentExecutionWorkflow.execute,
+        input_payload,
+        id=f"wf-{uuid4()}",
+        task_queue="test-tool-queue",
+    )
+    result = await handle.result()
+
+    # Assertions --------------------------------------------------------------
+    assert result.status == "completed"
+    # ExecuteTool called exactly once
+    assert execute_tool_called == ["web_search"]
+
+    # A tool result message should have been persisted
+    assert any(m.role == "tool" for m in created_steps)
+
+    assert finalized == ["completed"]
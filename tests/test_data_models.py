@@ -23,7 +23,7 @@ def test_tool_call_roundtrip():
 
 def test_tool_call_result_roundtrip():
     tool_call = ToolCall(name="fake", arguments={})
-    result = ToolCallResult(tool_call_id=tool_call.id, content={"ok": True})
+    result = ToolCallResult(tool_call_id=tool_call.id, content={"kind": "json", "value": {"ok": True}})
     json_str = result.model_dump_json()
     parsed = ToolCallResult.model_validate_json(json_str)
     assert parsed == result
@@ -6,13 +6,13 @@ from unittest.mock import AsyncMock, patch
 import pytest
 
 from truss.activities.llm_activities import llm_activity
-from truss.data_models import AgentConfig, LLMConfig, Message
+from truss.data_models import AgentConfig, LLMConfig, Message, MessagesRef
 
 # Stub PostgresStorage for tests to avoid hitting a real database
 
 
 class _DummyStorage:  # noqa: D101 – test helper
-    def create_run_step_from_message(self, run_id, message):  # noqa: D401
+    async def create_run_step_from_message_async(self, run_id, message):  # noqa: D401
         # Simply record that the method was called; could attach to self later if needed.
         self.called_with = (run_id, message)
         return None
@@ -25,11 +25,27 @@ class _FakeRedis:  # noqa: D101 – test helper
     async def publish(self, channel: str, message: str) -> None:  # noqa: D401
         self.published.append((channel, message))
 
+    def pipeline(self, transaction: bool = True) -> "_FakePipeline":  # noqa: D401
+        return _FakePipeline(self)
+
     async def aclose(self) -> None:  # noqa: D401
-        # Nothing to clean
         pass
 
 
+class _FakePipeline:  # noqa: D101 – test helper
+    def __init__(self, parent: _FakeRedis) -> None:  # noqa: D401
+        self._parent = parent
+        self._queued: List[tuple[str, str]] = []
+
+    def publish(self, channel: str, message: str) -> "_FakePipeline":  # noqa: D401
+        self._queued.append((channel, message))
+        return self
+
+    async def execute(self) -> None:  # noqa: D401
+        self._parent.published.extend(self._queued)
+        self._queued = []
+
+
 async def _dummy_stream() -> AsyncIterator[Dict[str, Any]]:  # noqa: D401 – helper
     yield {"choices": [{"delta": {"content": "Hi"}}]}
     yield {"choices": [{"delta": {"content": " there"}}]}
@@ -43,24 +59,26 @@ async def test_llm_activity_publishes_chunks_to_redis() -> None:  # noqa: D401 
     llm_cfg = LLMConfig(model_name="gpt-4o", temperature=0.0)
     agent_cfg = AgentConfig(name="Test", system_prompt="Hi", llm_config=llm_cfg)
     msgs = [Message(role="user", content="Hello")]
+    msgs_ref = MessagesRef(session_id=session_id, up_to_seq=len(msgs))
 
     fake_redis = _FakeRedis()
 
     with (
         patch("truss.activities.llm_activities._get_redis_client", new=AsyncMock(return_value=fake_redis)),
-        patch("truss.activities.llm_activities.stream_completion", new=AsyncMock(return_value=_dummy_stream())),
-        patch("truss.activities.llm_activities.PostgresStorage.from_database_url", return_value=_DummyStorage()),
+        patch("truss.core.llm_client.stream_completion", new=AsyncMock(return_value=_dummy_stream())),
+        patch("truss.activities.llm_activities._get_storage", return_value=_DummyStorage()),
+        patch("truss.activities.llm_activities._resolve_messages", return_value=msgs),
     ):
-        await llm_activity(agent_cfg, msgs, session_id, run_id)  # type: ignore[arg-type]
+        await llm_activity(agent_cfg, msgs_ref, session_id, run_id)  # type: ignore[arg-type]
 
     # Two chunks should have been published
     assert len(fake_redis.published) == 2
-    expected_channel = f"stream:{session_id}"
+    expected_channel = f"stream:{session_id}".encode("ascii")
     assert all(channel == expected_channel for channel, _ in fake_redis.published)
 
-    # Verify payloads are JSON-encoded strings matching the original chunks
+    # Payloads carry only the trimmed deltas, not the provider envelope
     decoded = [json.loads(payload) for _, payload in fake_redis.published]
     assert decoded == [
-        {"choices": [{"delta": {"content": "Hi"}}]},
-        {"choices": [{"delta": {"content": " there"}}]},
-    ] 
+        {"t": "Hi"},
+        {"t": " there"},
+    ]
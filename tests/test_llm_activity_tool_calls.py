@@ -5,7 +5,7 @@ from unittest.mock import AsyncMock, patch
 import pytest
 
 from truss.activities.llm_activities import llm_activity
-from truss.data_models import AgentConfig, LLMConfig, Message, ToolCall
+from truss.data_models import AgentConfig, LLMConfig, Message, MessagesRef, ToolCall
 
 
 class _FakeRedis:  # noqa: D101 – test helper
@@ -15,10 +15,27 @@ class _FakeRedis:  # noqa: D101 – test helper
     async def publish(self, channel: str, message: str) -> None:  # noqa: D401
         self.published.append((channel, message))
 
+    def pipeline(self, transaction: bool = True) -> "_FakePipeline":  # noqa: D401
+        return _FakePipeline(self)
+
     async def aclose(self) -> None:  # noqa: D401
         pass
 
 
+class _FakePipeline:  # noqa: D101 – test helper
+    def __init__(self, parent: _FakeRedis) -> None:  # noqa: D401
+        self._parent = parent
+        self._queued: List[tuple[str, str]] = []
+
+    def publish(self, channel: str, message: str) -> "_FakePipeline":  # noqa: D401
+        self._queued.append((channel, message))
+        return self
+
+    async def execute(self) -> None:  # noqa: D401
+        self._parent.published.extend(self._queued)
+        self._queued = []
+
+
 async def _dummy_stream() -> AsyncIterator[Dict[str, Any]]:  # noqa: D401 – helper
     # Two-part tool call arguments – OpenAI style
     yield {
@@ -59,7 +76,7 @@ async def _dummy_stream() -> AsyncIterator[Dict[str, Any]]:  # noqa: D401 – he
 
 
 class _DummyStorage:  # noqa: D101 – test helper
-    def create_run_step_from_message(self, run_id, message):  # noqa: D401
+    async def create_run_step_from_message_async(self, run_id, message):  # noqa: D401
         self.called_with = (run_id, message)
         return None
 
@@ -75,15 +92,17 @@ async def test_llm_activity_accumulates_tool_calls() -> None:  # noqa: D401
         llm_config=LLMConfig(model_name="gpt-4o", temperature=0.0),
     )
     msgs = [Message(role="user", content="weather?")]
+    msgs_ref = MessagesRef(session_id=session_id, up_to_seq=len(msgs))
 
     fake_redis = _FakeRedis()
 
     with (
         patch("truss.activities.llm_activities._get_redis_client", new=AsyncMock(return_value=fake_redis)),
-        patch("truss.activities.llm_activities.stream_completion", new=AsyncMock(return_value=_dummy_stream())),
-        patch("truss.activities.llm_activities.PostgresStorage.from_database_url", return_value=_DummyStorage()),
+        patch("truss.core.llm_client.stream_completion", new=AsyncMock(return_value=_dummy_stream())),
+        patch("truss.activities.llm_activities._get_storage", return_value=_DummyStorage()),
+        patch("truss.activities.llm_activities._resolve_messages", return_value=msgs),
     ):
-        final_msg = await llm_activity(agent_cfg, msgs, session_id, run_id)  # type: ignore[arg-type]
+        final_msg = await llm_activity(agent_cfg, msgs_ref, session_id, run_id)  # type: ignore[arg-type]
 
     assert final_msg.tool_calls is not None
     assert len(final_msg.tool_calls) == 1
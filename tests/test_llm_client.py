@@ -32,8 +32,9 @@ async def test_stream_completion_wrapper_sends_correct_params() -> None:
         Message(role="user", content="Say hello"),
     ]
 
-    # We'll monkeypatch litellm.acompletion so no external API call happens.
-    with patch("truss.core.llm_client.litellm.acompletion", new=AsyncMock()) as mocked:
+    # litellm is imported lazily – patch the real module's acompletion so no
+    # external API call happens.
+    with patch("litellm.acompletion", new=AsyncMock()) as mocked:
         mocked.return_value = _dummy_stream()
 
 
@@ -1,31 +1,41 @@
+import asyncio
+
 import pytest
 
 from uuid import uuid4
 
-from temporalio.exceptions import ApplicationError
 from temporalio import workflow as temporal_workflow
 
 from truss.data_models import (
     AgentWorkflowInput,
     Message,
-    AgentMemory,
     ToolCall,
     ToolCallResult,
+    ToolCallText,
 )
 from truss.workflows.agent_workflow import TemporalAgentExecutionWorkflow
 
 
+class _FakeWorkflowInfo:
+    """Stand-in for workflow.info() outside a Temporal workflow context."""
+
+    def get_current_history_length(self) -> int:
+        return 0
+
+
 @pytest.mark.asyncio
 async def test_workflow_success_no_tool_calls(monkeypatch):
     """Workflow should complete when LLM returns a final assistant message."""
 
     async def fake_execute_activity(name: str, *args, **kwargs):  # noqa: D401 – test stub
-        if name == "CreateRun":
+        if name == "CreateRunWithInitialStep":
             return str(uuid4())
+        if name == "ResolveAgentConfig":
+            return None
         if name == "CreateRunStep":
             return str(uuid4())
-        if name == "GetRunMemory":
-            return AgentMemory(messages=[Message(role="user", content="hi")])
+        if name == "GetRunMemorySince":
+            return [Message(role="user", content="hi")]
         if name == "LLMStreamPublish":
             # Assistant returns no tool calls – workflow should finish.
             return Message(role="assistant", content="done", tool_calls=None)
@@ -36,6 +46,11 @@ async def test_workflow_success_no_tool_calls(monkeypatch):
     # Patch Temporal execute_activity helper so that all calls within the workflow
     # are routed to our stub implementation.
     monkeypatch.setattr(temporal_workflow, "execute_activity", fake_execute_activity, raising=True)
+    monkeypatch.setattr(temporal_workflow, "execute_local_activity", fake_execute_activity, raising=True)
+    # start_local_activity returns a handle awaited later; the async stub's
+    # un-awaited coroutine behaves the same way.
+    monkeypatch.setattr(temporal_workflow, "start_local_activity", fake_execute_activity, raising=True)
+    monkeypatch.setattr(temporal_workflow, "info", _FakeWorkflowInfo, raising=True)
 
     wf = TemporalAgentExecutionWorkflow()
     input_payload = AgentWorkflowInput(
@@ -56,28 +71,44 @@ async def test_workflow_tool_execution(monkeypatch):
     call_counters = {"llm": 0, "execute_tool": 0}
 
     async def fake_execute_activity(name: str, *args, **kwargs):
-        if name == "CreateRun":
+        if name == "CreateRunWithInitialStep":
             return str(uuid4())
+        if name == "ResolveAgentConfig":
+            return None
         if name == "CreateRunStep":
             return str(uuid4())
-        if name == "GetRunMemory":
-            return AgentMemory(messages=[Message(role="user", content="hey")])
+        if name == "GetRunMemorySince":
+            return [Message(role="user", content="hey")]
         if name == "LLMStreamPublish":
             call_counters["llm"] += 1
             if call_counters["llm"] == 1:
                 tool_call = ToolCall(name="web_search", arguments={"query": "hey"})
                 return Message(role="assistant", content=None, tool_calls=[tool_call])
             return Message(role="assistant", content="done", tool_calls=None)
-        if name == "ExecuteTool":
-            call_counters["execute_tool"] += 1
-            # Activity is invoked with kwargs containing 'args': [tool_call]
-            tool_call = kwargs.get("args", [])[0]
-            return ToolCallResult(tool_call_id=tool_call.id, content="result")
+        if name == "ExecuteToolsAndPersist":
+            # Activity is invoked with kwargs containing 'args': [run_id, tool_calls]
+            tool_calls = kwargs.get("args", [])[1]
+            call_counters["execute_tool"] += len(tool_calls)
+            return [
+                ToolCallResult(tool_call_id=tc.id, content=ToolCallText(value="result"))
+                for tc in tool_calls
+            ]
         if name == "FinalizeRun":
             return None
         raise RuntimeError(f"Unexpected activity {name}")
 
+    async def fake_wait_condition(predicate, **kwargs):
+        while not predicate():
+            await asyncio.sleep(0.01)
+
     monkeypatch.setattr(temporal_workflow, "execute_activity", fake_execute_activity, raising=True)
+    monkeypatch.setattr(temporal_workflow, "execute_local_activity", fake_execute_activity, raising=True)
+    # start_local_activity/start_activity return handles awaited later; the
+    # async stub's un-awaited coroutine behaves the same way.
+    monkeypatch.setattr(temporal_workflow, "start_local_activity", fake_execute_activity, raising=True)
+    monkeypatch.setattr(temporal_workflow, "start_activity", fake_execute_activity, raising=True)
+    monkeypatch.setattr(temporal_workflow, "wait_condition", fake_wait_condition, raising=True)
+    monkeypatch.setattr(temporal_workflow, "info", _FakeWorkflowInfo, raising=True)
 
     wf = TemporalAgentExecutionWorkflow()
     input_payload = AgentWorkflowInput(
@@ -99,14 +130,18 @@ async def test_workflow_cancellation(monkeypatch):
 
     async def fake_execute_activity(name: str, *args, **kwargs):
         # We only need to stub activities used prior to cancellation check.
-        if name in {"CreateRun", "CreateRunStep"}:
+        if name in {"CreateRunWithInitialStep", "CreateRunStep"}:
             return str(uuid4())
-        if name == "GetRunMemory":
-            return AgentMemory(messages=[Message(role="user", content="hi")])
+        if name == "GetRunMemorySince":
+            return [Message(role="user", content="hi")]
         # We will never reach LLM or FinalizeRun due to cancellation.
         return None
 
     monkeypatch.setattr(temporal_workflow, "execute_activity", fake_execute_activity, raising=True)
+    monkeypatch.setattr(temporal_workflow, "execute_local_activity", fake_execute_activity, raising=True)
+    # start_local_activity returns a handle awaited later; the async stub's
+    # un-awaited coroutine behaves the same way.
+    monkeypatch.setattr(temporal_workflow, "start_local_activity", fake_execute_activity, raising=True)
 
     wf = TemporalAgentExecutionWorkflow()
     wf.request_cancellation()  # simulate external signal before execution begins
@@ -117,7 +152,7 @@ async def test_workflow_cancellation(monkeypatch):
         run_id=None,
     )
 
-    with pytest.raises(ApplicationError):
+    with pytest.raises(asyncio.CancelledError):
         await wf.execute(input_payload)
 
     # Ensure flag is set
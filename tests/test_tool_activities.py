@@ -1,4 +1,3 @@
-import json
 import pytest
 
 from temporalio.exceptions import ApplicationError
@@ -18,8 +17,8 @@ async def test_execute_tool_activity_known_tool():
     result = await execute_tool_activity(call)
 
     assert result.tool_call_id == call.id
-    # the stub returns JSON string – parse to verify structure
-    payload = json.loads(result.content)
+    # the stub returns a dict – packaged as the structured content variant
+    payload = result.content.value
     assert "results" in payload
 
 
@@ -9,38 +9,230 @@ focuses solely on the *Redis publishing* requirement (Task 5.2).
 
 from __future__ import annotations
 
+import asyncio
 import json
+import tempfile
+import threading
+from collections import OrderedDict
+from time import monotonic
 from uuid import UUID
-from typing import List, Dict, Any
+from typing import List, Dict, Any, TYPE_CHECKING
 
-import anyio
-import redis.asyncio as redis
 from temporalio import activity
-from anyio import to_thread
 
-from truss.core.llm_client import stream_completion
-from truss.core.storage import PostgresStorage
-from truss.data_models import AgentConfig, Message, ToolCall
+try:  # orjson is a C extension returning bytes directly – ideal for the hot loop
+    from orjson import dumps as _dumps, loads as _loads
+except ImportError:  # pragma: no cover – compact stdlib fallback
+    from json import loads as _loads
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+
+from truss.data_models import AgentConfig, Message, MessagesRef, ToolCall
 from truss.settings import get_settings
 
+if TYPE_CHECKING:  # heavy deps are imported lazily at call time, see below
+    import redis.asyncio as redis
+
+    from truss.core.storage import PostgresStorage
+
 __all__ = [
     "llm_activity",
+    "close_redis_client",
 ]
 
 
+# Process-wide Redis client shared by every activity invocation.  Creating a
+# client per call would pay connection-pool setup (and TCP/TLS handshake) on
+# every LLM stream, so we build it lazily once and keep it for the worker's
+# lifetime – see :func:`close_redis_client` for the shutdown half.
+#
+# ``redis.asyncio``, LiteLLM and the storage layer are all imported lazily at
+# first use: test suites that register fake ``LLMStreamPublish`` activities
+# import this module without ever paying those import costs.
+_redis_client: redis.Redis | None = None
+_redis_loop: asyncio.AbstractEventLoop | None = None
+_redis_lock = asyncio.Lock()
+
+
 async def _get_redis_client() -> "redis.Redis":
-    """Return an *async* Redis client built from application settings."""
+    """Return the process-wide *async* Redis client, creating it lazily.
+
+    The client is rebuilt if the running event loop changed since creation
+    (each test runs on a fresh loop; connections are bound to the loop that
+    created them).
+    """
+
+    global _redis_client, _redis_loop
+
+    # Double-checked locking: the fast path avoids the lock entirely once the
+    # client exists; the lock only serialises concurrent first calls.
+    loop = asyncio.get_running_loop()
+    if _redis_client is None or _redis_loop is not loop:
+        async with _redis_lock:
+            if _redis_client is None or _redis_loop is not loop:
+                import redis.asyncio as redis
+
+                settings = get_settings()
+                # The Python Redis library automatically derives TLS/DB options
+                # from the URL so we can simply forward it.  Keepalive plus a
+                # generous pool cap suit many long-lived streaming activities
+                # sharing one client.
+                _redis_client = redis.from_url(
+                    settings.redis_url,
+                    decode_responses=False,
+                    max_connections=64,
+                    socket_keepalive=True,
+                )
+                _redis_loop = loop
+    return _redis_client
+
+
+def _get_storage() -> PostgresStorage:
+    """Return the process-wide shared storage handle (lazy import)."""
+
+    from truss.core.storage import get_shared_storage
+
+    return get_shared_storage()
+
+
+# ---------------------------------------------------------------------------
+# Session-message cache for MessagesRef dereferencing
+# ---------------------------------------------------------------------------
+# The workflow hands over a (session_id, up_to_seq) handle instead of the
+# message list itself, so the activity payload stays O(1) per call.  The
+# conversation is rebuilt here from storage; per-session caching means each
+# subsequent call only reads the tail appended since the previous one.
+#
+# _resolve_messages runs on asyncio.to_thread pool threads, so every cache
+# access is guarded by the lock; cached lists are treated as immutable
+# (extension builds a new list) so readers never see partial mutation.
+_MESSAGES_CACHE: "OrderedDict[UUID, List[Message]]" = OrderedDict()
+_MESSAGES_CACHE_LOCK = threading.Lock()
+_MESSAGES_CACHE_MAX_SESSIONS = 128
+
+
+def _resolve_messages(ref: MessagesRef) -> List[Message]:
+    """Dereference *ref* into its message-list prefix, reading only the tail.
+
+    Runs on a worker thread (blocking SQLAlchemy).  Returns exactly the first
+    ``ref.up_to_seq`` messages of the session stream; raises when storage has
+    not caught up yet so the activity retry re-reads a consistent prefix.
+    """
+
+    from temporalio.exceptions import ApplicationError
+
+    from truss.activities.storage_activities import _load_messages
+
+    with _MESSAGES_CACHE_LOCK:
+        messages = _MESSAGES_CACHE.get(ref.session_id, [])
+
+    if len(messages) < ref.up_to_seq:
+        # DB read happens outside the lock – only the publish step re-locks,
+        # keeping whichever concurrent reader got further.
+        messages = messages + _load_messages(
+            _get_storage(), ref.session_id, offset=len(messages)
+        )
+        with _MESSAGES_CACHE_LOCK:
+            existing = _MESSAGES_CACHE.get(ref.session_id)
+            if existing is not None and len(existing) >= len(messages):
+                messages = existing
+            else:
+                _MESSAGES_CACHE[ref.session_id] = messages
+            _MESSAGES_CACHE.move_to_end(ref.session_id)
+            while len(_MESSAGES_CACHE) > _MESSAGES_CACHE_MAX_SESSIONS:
+                _MESSAGES_CACHE.popitem(last=False)
+    else:
+        with _MESSAGES_CACHE_LOCK:
+            if ref.session_id in _MESSAGES_CACHE:
+                _MESSAGES_CACHE.move_to_end(ref.session_id)
+
+    if len(messages) < ref.up_to_seq:
+        raise ApplicationError(
+            f"Session {ref.session_id} has {len(messages)} persisted messages, "
+            f"reference expects {ref.up_to_seq}"
+        )
+    return messages[: ref.up_to_seq]
+
+
+# Assistant content stays in memory up to this many characters, then spills to
+# a temp file – bounds per-activity RSS for pathological 100k-token streams.
+_CONTENT_SPOOL_BYTES = 256 * 1024
+
+# Upper bound on chunks per pipeline flush.  Individual PUBLISH commands pay a
+# full Redis round trip per provider chunk; batching a handful of chunks into
+# one pipeline amortizes that RTT while keeping the UI live.
+_FLUSH_MAX_CHUNKS = 8
+
+# Heartbeat coalescing – once per chunk drowns the Temporal SDK in no-op
+# records on chatty streams; every N chunks or ~100 ms gives the same
+# liveness signal at a fraction of the overhead.
+_HEARTBEAT_MAX_CHUNKS = 32
+_HEARTBEAT_MAX_INTERVAL = 0.1  # seconds
+
+
+async def _flush_chunks(redis_client: "redis.Redis", channel: str, payloads: List[Any]) -> None:
+    """Publish buffered chunk *payloads* to *channel* in one round trip."""
+
+    if len(payloads) == 1:
+        # Fast path – a pipeline object buys nothing for a single command.
+        await redis_client.publish(channel, payloads[0])
+        return
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe_publish = pipe.publish  # LOAD_FAST beats LOAD_ATTR inside the loop
+    for payload in payloads:
+        pipe_publish(channel, payload)
+    await pipe.execute()
+
+
+async def _publish_from_queue(
+    redis_client: "redis.Redis",
+    channel: bytes,
+    queue: asyncio.Queue,
+) -> None:
+    """Drain payloads from *queue*, publishing in pipelined batches.
+
+    Runs as a background task so chunk ingestion never blocks on Redis round
+    trips; each iteration greedily batches whatever is already queued (capped
+    at ``_FLUSH_MAX_CHUNKS``) into one pipeline.  A ``None`` sentinel flushes
+    the remainder and terminates the task.
+    """
+
+    while True:
+        payload = await queue.get()
+        if payload is None:
+            return
+        batch = [payload]
+        while len(batch) < _FLUSH_MAX_CHUNKS:
+            try:
+                nxt = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if nxt is None:
+                await _flush_chunks(redis_client, channel, batch)
+                return
+            batch.append(nxt)
+        await _flush_chunks(redis_client, channel, batch)
+
 
-    settings = get_settings()
-    # The Python Redis library automatically derives TLS/DB options from the
-    # URL so we can simply forward it.
-    return redis.from_url(settings.redis_url, decode_responses=False)
+async def close_redis_client() -> None:
+    """Close the shared Redis client – call once at worker shutdown."""
+
+    global _redis_client
+    if _redis_client is not None:
+        try:
+            await _redis_client.aclose()
+        except Exception:  # pragma: no cover – best-effort teardown
+            activity.logger.warning("Failed to close Redis client", exc_info=True)
+        _redis_client = None
 
 
 @activity.defn(name="LLMStreamPublish")
 async def llm_activity(
     agent_config: AgentConfig,
-    messages: List[Message],
+    messages_ref: MessagesRef,
     session_id: UUID,
     run_id: UUID,  # noqa: D401 – part of stable signature, unused for now
 ) -> Message:  # noqa: D401 – imperative docstring handled by module
@@ -48,11 +240,14 @@ async def llm_activity(
 
     This *Temporal activity* performs the following high-level steps:
 
-    1. Derive LiteLLM parameters from the supplied *agent_config* and send a
+    1. Dereference *messages_ref* into the conversation prefix it pins (the
+       workflow ships the O(1) handle rather than the O(n) message list) and
+       prepend the configured system prompt, when any.
+    2. Derive LiteLLM parameters from the supplied *agent_config* and send a
        streaming chat-completion request using :func:`stream_completion`.
-    2. For every chunk returned by the provider, immediately publish the raw
-       JSON data to Redis channel ``stream:{session_id}`` for consumption by
-       real-time clients.
+    3. For every chunk returned by the provider, publish the trimmed delta
+       (``{"t": text, "tc": tool_call_deltas}``) to Redis channel
+       ``stream:{session_id}`` for consumption by real-time clients.
 
     This implementation **extends** the previous streaming-only version by
     *accumulating* the provider deltas into a **complete** :class:`Message`
@@ -65,133 +260,191 @@ async def llm_activity(
     # ------------------------------------------------------------------
     redis_client = await _get_redis_client()
 
-    try:
-        # ------------------------------------------------------------------
-        # Initiate streaming LLM request
-        # ------------------------------------------------------------------
-        chunk_stream = await stream_completion(agent_config=agent_config, conversation=messages)
-
-        # ------------------------------------------------------------------
-        # Forward chunks to Redis in *real time*
-        # ------------------------------------------------------------------
-        channel = f"stream:{session_id}"
-        full_content: List[str] = []  # collect assistant text fragments
+    # ------------------------------------------------------------------
+    # Rebuild the conversation from the handle
+    # ------------------------------------------------------------------
+    # Every producer writes its run steps synchronously before completing,
+    # so by the time the workflow schedules this call the referenced prefix
+    # is durable and the read below can satisfy it.
+    messages = await asyncio.to_thread(_resolve_messages, messages_ref)
+    if agent_config is not None and agent_config.system_prompt:
+        messages = [
+            Message.model_construct(
+                role="system",
+                content=agent_config.system_prompt,
+                tool_calls=None,
+                tool_call_id=None,
+            ),
+            *messages,
+        ]
 
-        # Track partial tool call construction:
-        #   map tool_call_id -> {"name": str, "arguments": List[str]}
-        _tool_buffers: Dict[str, Dict[str, Any]] = {}
-        _tool_call_order: List[str] = []  # preserve order of first appearance
+    # ------------------------------------------------------------------
+    # Initiate streaming LLM request
+    # ------------------------------------------------------------------
+    from truss.core.llm_client import stream_completion  # lazy – pulls in litellm
 
-        # The final Message we'll return; initialised later to satisfy mypy.
-        final_message: Message | None = None
+    chunk_stream = await stream_completion(agent_config=agent_config, conversation=messages)
 
+    # ------------------------------------------------------------------
+    # Forward chunks to Redis in *real time*
+    # ------------------------------------------------------------------
+    # Pre-encode once – the client runs with decode_responses=False and a UUID
+    # stringifies to ASCII, so every publish can reuse the same bytes object.
+    channel = f"stream:{session_id}".encode("ascii")
+    # Assistant text accumulates in a single resizable buffer – amortized O(1)
+    # writes and one final copy, versus one str object per delta with list+join.
+    # The buffer spills to disk past _CONTENT_SPOOL_BYTES so a very long
+    # generation cannot balloon worker RSS while the stream is in flight.
+    full_content = tempfile.SpooledTemporaryFile(max_size=_CONTENT_SPOOL_BYTES, mode="w+")
+
+    # Track partial tool call construction:
+    #   map tool_call_id -> {"name": str, "arguments": bytearray}
+    # Argument fragments append into a bytearray (C-level memcpy, amortized
+    # O(1) growth) that orjson can parse in place at the end – no str list to
+    # walk and no final join copy.
+    _tool_buffers: Dict[str, Dict[str, Any]] = {}
+    _tool_call_order: List[str] = []  # preserve order of first appearance
+    # Local bindings for the per-chunk inner loop – LOAD_FAST instead of a
+    # method lookup on every partial tool-call object.
+    _buf_get = _tool_buffers.get
+    _order_append = _tool_call_order.append
+
+    # Heartbeat throttle state – see _HEARTBEAT_MAX_CHUNKS above.  Both SDK
+    # entry points are stable for the life of the activity, so bind them once
+    # rather than resolving module attributes on every chunk.
+    _heartbeat = activity.heartbeat
+    _logger_warning = activity.logger.warning
+    _hb_chunks = 0
+    _last_hb = monotonic()
+
+    # Chunks flow through a queue drained by one background publisher task, so
+    # ingestion of the next provider chunk is never blocked on a Redis round
+    # trip and batch sizes adapt to however much is queued at flush time.
+    _publish_queue: asyncio.Queue = asyncio.Queue()
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(_publish_from_queue(redis_client, channel, _publish_queue))
         async for chunk in chunk_stream:  # type: Dict[str, Any]
-            # Publish raw chunk for real-time UI
-            await redis_client.publish(channel, json.dumps(chunk))
+            # Contract: each chunk is handled as ONE parsed dict shared by both the
+            # publish and accumulation paths.  LiteLLM may yield ModelResponse
+            # objects – normalise those exactly once here rather than paying a
+            # serialize/re-parse per consumer.
+            if not isinstance(chunk, dict):
+                chunk = chunk.model_dump()
 
             # ------------------------------------------------------------------
             # Accumulate textual deltas for the final assistant message
             # ------------------------------------------------------------------
-            try:
-                delta = chunk["choices"][0]["delta"]
-            except (KeyError, IndexError, TypeError):  # pragma: no cover – guard against provider shape changes
-                activity.logger.warning("Unexpected chunk shape encountered while accumulating content: %s", chunk)
+            choices = chunk.get("choices")
+            delta = choices[0].get("delta") if choices else None
+            if not delta:  # pragma: no cover – guard against provider shape changes
+                _logger_warning("Unexpected chunk shape encountered while accumulating content: %s", chunk)
                 continue
 
+            # Publish only what the UI renders – the provider envelope (id,
+            # model, fingerprint, logprobs, …) dwarfs the per-token payload and
+            # would be re-serialized and shipped over Redis for every chunk.
+            compact: Dict[str, Any] = {}
+
             # LiteLLM normalises OpenAI-style streaming payloads where text is
             # provided in the ``content`` field.
             if (content_piece := delta.get("content")):
-                full_content.append(content_piece)
+                full_content.write(content_piece)
+                compact["t"] = content_piece
 
             # NOTE: Tool/function call accumulation will be handled in a future
             # sub-task.  We add support for OpenAI-compatible streaming tool
             # calls where the assistant emits "tool_calls": [ { id, type, function: { name, arguments } } ]
 
             if (tool_calls_delta := delta.get("tool_calls")):
+                compact["tc"] = tool_calls_delta
                 for tc in tool_calls_delta:  # each partial object
                     tc_id: str = tc.get("id")  # should always be present
                     if tc_id is None:  # pragma: no cover – guard
                         continue
 
-                    if tc_id not in _tool_buffers:
-                        _tool_buffers[tc_id] = {"name": None, "arguments": []}
-                        _tool_call_order.append(tc_id)
-
-                    buf = _tool_buffers[tc_id]
+                    buf = _buf_get(tc_id)
+                    if buf is None:
+                        buf = {"name": None, "arguments": bytearray()}
+                        _tool_buffers[tc_id] = buf
+                        _order_append(tc_id)
 
                     if func := tc.get("function"):
                         # Name might be sent in the first chunk, but may repeat – ensure we keep first non-null
-                        if func.get("name"):
-                            buf["name"] = func["name"]
+                        if (name := func.get("name")):
+                            buf["name"] = name
 
                         # The arguments property may arrive in incremental chunks – append if present
                         if (args_part := func.get("arguments")) is not None:
-                            buf["arguments"].append(args_part)
+                            buf["arguments"] += args_part.encode("utf-8")
+
+            # Hand the trimmed delta to the background publisher for the
+            # real-time UI.
+            if compact:
+                _publish_queue.put_nowait(_dumps(compact))
 
             # Emit a heartbeat so Temporal knows this activity is healthy even
-            # during long-running streams.
-            try:
-                activity.heartbeat()
-            except RuntimeError:
-                # When running outside an activity context (e.g. plain unit
-                # tests) heartbeat() raises – safely ignore so local tests can
-                # exercise the logic without Temporal worker.
-                pass
-
-        # ------------------------------------------------------------------
-        # Build the final assistant Message once streaming completed
-        # ------------------------------------------------------------------
-        tool_calls_final: List[ToolCall] | None = None
-        if _tool_buffers:
-            from json import loads  # local import to avoid top-level cost
-
-            tool_calls_final = []
-            for tid in _tool_call_order:
-                buf = _tool_buffers[tid]
-                raw_args = "".join(buf["arguments"])
+            # during long-running streams – coalesced so chatty models don't
+            # pay SDK overhead per chunk.
+            _hb_chunks += 1
+            _hb_now = monotonic()
+            if _hb_chunks >= _HEARTBEAT_MAX_CHUNKS or _hb_now - _last_hb >= _HEARTBEAT_MAX_INTERVAL:
                 try:
-                    parsed_args = loads(raw_args) if raw_args else {}
-                except Exception:  # pragma: no cover – leave raw string if malformed
-                    parsed_args = {"raw": raw_args}
-
-                tool_calls_final.append(ToolCall(id=tid, name=buf["name"], arguments=parsed_args))
-
-        final_message = Message(
-            role="assistant",
-            content="".join(full_content) if full_content else None,
-            tool_calls=tool_calls_final,
-        )
-
-        # ------------------------------------------------------------------
-        # ATOMIC DURABILITY: Persist the *complete* message before returning
-        # ------------------------------------------------------------------
-        storage = PostgresStorage.from_database_url(get_settings().database_url)
-
-        # Off-load the blocking DB write to a worker thread so we don't block
-        # the event-loop inside the activity runtime.
-        await to_thread.run_sync(
-            storage.create_run_step_from_message,
-            run_id,
-            final_message,
-            cancellable=True,
-        )
+                    _heartbeat()
+                except RuntimeError:
+                    # When running outside an activity context (e.g. plain unit
+                    # tests) heartbeat() raises – safely ignore so local tests
+                    # can exercise the logic without Temporal worker.
+                    pass
+                _hb_chunks = 0
+                _last_hb = _hb_now
+
+        # Signal end-of-stream; TaskGroup exit awaits the publisher's final flush.
+        _publish_queue.put_nowait(None)
 
-    finally:
-        # Ensure the connection is closed even if streaming raises.
-        with anyio.CancelScope(shield=True):
-            # Best-effort close; swallow exceptions so Temporal retries aren't
-            # masked by connection teardown issues.
+    # ------------------------------------------------------------------
+    # Build the final assistant Message once streaming completed
+    # ------------------------------------------------------------------
+    tool_calls_final: List[ToolCall] | None = None
+    if _tool_buffers:
+        tool_calls_final = []
+        for tid in _tool_call_order:
+            buf = _tool_buffers[tid]
+            raw_args = buf["arguments"]
             try:
-                await redis_client.aclose()
-            except Exception:  # pragma: no cover
-                activity.logger.warning("Failed to close Redis client", exc_info=True)
-
-    # Even if streaming raised an exception the finally block above will have
-    # executed – but ``final_message`` may still be *None*.  In that case we
-    # re-raise to let Temporal handle retries.  Otherwise we can safely return
-    # the accumulated response.
+                parsed_args = _loads(raw_args) if raw_args else {}
+            except Exception:  # pragma: no cover – leave raw string if malformed
+                parsed_args = {"raw": raw_args.decode("utf-8", errors="replace")}
+
+            tool_calls_final.append(ToolCall(id=tid, name=buf["name"], arguments=parsed_args))
+
+    full_content.seek(0)
+    content = full_content.read()
+    full_content.close()
+
+    # A stream that yielded neither text nor tool calls is a provider failure,
+    # not an answer – raise so Temporal retries instead of handing the
+    # workflow an empty assistant message it would treat as final.
+    if not content and not tool_calls_final:
+        raise RuntimeError("LLM stream produced no content or tool calls")
+
+    # Inputs are trusted here (role is a literal, content came straight from the
+    # provider stream) so skip per-field validation on the return path.
+    final_message = Message.model_construct(
+        role="assistant",
+        content=content or None,
+        tool_calls=tool_calls_final,
+        tool_call_id=None,
+    )
 
-    if final_message is None:
-        raise RuntimeError("LLM streaming did not yield any chunks – cannot build assistant message")
-
-    return final_message 
+    # ------------------------------------------------------------------
+    # ATOMIC DURABILITY: Persist the *complete* message before returning
+    # ------------------------------------------------------------------
+    # The write must land before the activity completes: this row is what
+    # MessagesRef dereferencing rebuilds conversations from, and the tool
+    # batch the workflow schedules next persists *its* rows synchronously –
+    # deferring ours would risk losing it to a crash or committing it after
+    # the tool rows, corrupting the stream order.
+    await _get_storage().create_run_step_from_message_async(run_id, final_message)
+
+    return final_message
@@ -2,25 +2,89 @@
 
 The *StorageActivities* class is meant to be registered with a Temporal worker.
 It wraps blocking SQLAlchemy CRUD operations provided by
-:class:`truss.core.storage.postgres_storage.PostgresStorage` with
-``anyio.to_thread.run_sync`` so the worker event-loop remains responsive.
+:class:`truss.core.storage.postgres_storage.PostgresStorage` with a dedicated
+thread-pool executor so the worker event-loop remains responsive.
 """
 
 from __future__ import annotations
 
-import anyio
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from uuid import UUID
-from typing import List
+from typing import ClassVar, List, Tuple
 
 from temporalio import activity
 
 from truss.core.storage import PostgresStorage
-from truss.data_models import Message, AgentMemory, AgentConfig
+from truss.data_models import Message, AgentMemory, AgentConfig, ToolCall
+
+# Dedicated, bounded executor for DB work.  Sharing the runtime's default
+# thread pool with everything else lets bursts of concurrent activities
+# serialize behind unrelated blocking calls; a named pool sized to the DB
+# connection budget keeps persistence isolated and observable.
+_DB_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="truss-db")
+
+
+def _run_in_db_executor(fn, *args):
+    """Schedule *fn(*args)* on the dedicated DB executor."""
+
+    return asyncio.get_running_loop().run_in_executor(_DB_EXECUTOR, fn, *args)
+
+
+def _load_messages(
+    storage: PostgresStorage, session_id: UUID, offset: int = 0
+) -> List[Message]:
+    """Stream steps (from *offset*) in server-side batches into Messages.
+
+    Runs on the DB executor so the generator (which holds its session open)
+    is consumed entirely on one worker thread; only the final Pydantic
+    messages are materialized, never the full list of ORM rows.
+    """
+
+    messages: List[Message] = []
+    for step in storage.iter_steps_for_session(session_id, offset=offset):
+        # Rows were validated when written, so rebuild the models with
+        # model_construct and skip the per-field validator pass.
+        tool_calls = (
+            [ToolCall.model_construct(**tc) for tc in step.tool_calls]
+            if step.tool_calls
+            else None
+        )
+        messages.append(
+            Message.model_construct(
+                role=step.role.value,
+                content=step.content,
+                tool_calls=tool_calls,
+                tool_call_id=step.tool_call_id,
+            )
+        )
+    return messages
+
+
+def _load_memory(storage: PostgresStorage, session_id: UUID) -> AgentMemory:
+    """Build :class:`AgentMemory` from the full session history."""
+
+    return AgentMemory.from_messages(_load_messages(storage, session_id))
 
 
 class StorageActivities:  # noqa: WPS110 – name dictated by tech spec
     """Temporal activity collection encapsulating DB persistence logic."""
 
+    # Activity methods to register with the worker, in registration order.
+    # One immutable declaration next to the definitions – the worker resolves
+    # bound methods from it via getattr.
+    __activities__: ClassVar[Tuple[str, ...]] = (
+        "create_run",
+        "create_run_with_initial_step",
+        "create_run_step",
+        "create_run_steps_batch",
+        "get_run_memory",
+        "get_run_memory_since",
+        "resolve_agent_config",
+        "load_agent_config",
+        "finalize_run",
+    )
+
     def __init__(self, storage: PostgresStorage):
         self._storage = storage
 
@@ -30,43 +94,70 @@ class StorageActivities:  # noqa: WPS110 – name dictated by tech spec
     @activity.defn(name="CreateRun")  # explicit names keep API stable
     async def create_run(self, session_id: UUID) -> UUID:  # noqa: D401 – imperative
         """Insert a new *Run* row and return its primary-key UUID."""
-        run = await anyio.to_thread.run_sync(self._storage.create_run, session_id)
+        run = await _run_in_db_executor(self._storage.create_run, session_id)
         return run.id  # type: ignore[return-value]
 
+    @activity.defn(name="CreateRunWithInitialStep")
+    async def create_run_with_initial_step(self, session_id: UUID, user_message: Message) -> UUID:
+        """Insert a *Run* plus its first *RunStep* in one transaction.
+
+        Fuses the CreateRun/CreateRunStep pair the workflow issues at start-up
+        into a single activity, halving the scheduling and DB round-trips on
+        the initialisation path.  The fine-grained activities remain available
+        for callers that need them individually.
+        """
+        return await _run_in_db_executor(
+            self._storage.create_run_with_initial_step, session_id, user_message
+        )
+
     @activity.defn(name="CreateRunStep")
     async def create_run_step(self, run_id: UUID, message: Message) -> UUID:
         """Persist a :class:`Message` as a new *RunStep* row."""
-        step = await anyio.to_thread.run_sync(
+        step = await _run_in_db_executor(
             self._storage.create_run_step_from_message, run_id, message
         )
         return step.id  # type: ignore[return-value]
 
+    @activity.defn(name="CreateRunStepsBatch")
+    async def create_run_steps_batch(self, run_id: UUID, messages: List[Message]) -> List[UUID]:
+        """Persist several :class:`Message`s as *RunStep* rows in one INSERT."""
+        return await _run_in_db_executor(
+            self._storage.create_run_steps_from_messages, run_id, messages
+        )
+
     @activity.defn(name="GetRunMemory")
     async def get_run_memory(self, session_id: UUID) -> AgentMemory:
         """Fetch all messages for a session and convert to :class:`AgentMemory`."""
-        steps = await anyio.to_thread.run_sync(
-            self._storage.get_steps_for_session, session_id
+        return await _run_in_db_executor(_load_memory, self._storage, session_id)
+
+    @activity.defn(name="GetRunMemorySince")
+    async def get_run_memory_since(self, session_id: UUID, cursor: int = 0) -> List[Message]:
+        """Return only the messages appended after position *cursor*.
+
+        The workflow keeps its own copy of the history and asks for the tail,
+        so per-iteration payload size stays O(new messages) instead of
+        re-shipping the whole conversation every turn.  Steps are append-only
+        per session, which makes the integer offset a stable cursor.
+        """
+        return await _run_in_db_executor(
+            _load_messages, self._storage, session_id, cursor
+        )
+
+    @activity.defn(name="ResolveAgentConfig")
+    async def resolve_agent_config(self, session_id: UUID) -> AgentConfig | None:
+        """Resolve the :class:`AgentConfig` for a session (``None`` if unknown)."""
+        return await _run_in_db_executor(
+            self._storage.load_agent_config_for_session, session_id
         )
-        messages: List[Message] = []
-        for step in steps:
-            messages.append(
-                Message(
-                    role=step.role.value,
-                    content=step.content,
-                    tool_calls=step.tool_calls,  # type: ignore[arg-type]
-                    tool_call_id=step.tool_call_id,
-                )
-            )
-        return AgentMemory(messages=messages)
 
     @activity.defn(name="LoadAgentConfig")
     async def load_agent_config(self, agent_id: UUID) -> AgentConfig:
         """Return the Pydantic :class:`AgentConfig` for the given identifier."""
-        return await anyio.to_thread.run_sync(self._storage.load_agent_config, agent_id)
+        return await _run_in_db_executor(self._storage.load_agent_config, agent_id)
 
     @activity.defn(name="FinalizeRun")
     async def finalize_run(self, run_id: UUID, status: str, error: str | None = None) -> None:
         """Update final *Run* status and optional error message."""
-        await anyio.to_thread.run_sync(
+        await _run_in_db_executor(
             self._storage.update_run_status, run_id, status, error
-        ) 
+        )
@@ -8,15 +8,69 @@ minimal stub functions are provided to allow the activity to run and to keep
 unit-tests simple.
 """
 
+import asyncio
 import json
-from typing import Any, Awaitable, Callable, Dict, Mapping
+from typing import Any, Awaitable, Callable, Dict, List
+from uuid import UUID
 import os
 import httpx
 
+try:  # orjson (Rust) keeps argument parsing/result dumps off the stdlib path
+    import orjson as _json_fast
+
+    def _loads(raw: str | bytes) -> Any:
+        return _json_fast.loads(raw)
+
+    def _dumps_str(obj: Any) -> str:
+        return _json_fast.dumps(obj).decode()
+
+except ImportError:  # pragma: no cover – stdlib fallback
+    _loads = json.loads
+
+    def _dumps_str(obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+
 from temporalio import activity
 from temporalio.exceptions import ApplicationError
 
-from truss.data_models import ToolCall, ToolCallResult
+from truss.data_models import Message, ToolCall, ToolCallResult, ToolCallStructured, ToolCallText
+
+
+# ---------------------------------------------------------------------------
+# Shared HTTP client
+# ---------------------------------------------------------------------------
+# Tool calls hit external APIs; a client per call pays DNS + TCP + TLS setup
+# every time.  One keepalive-pooled client per worker amortizes that across
+# invocations (rebuilt if the running event loop changes, as in tests).
+_http_client: httpx.AsyncClient | None = None
+_http_client_loop: "asyncio.AbstractEventLoop | None" = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Return the shared :class:`httpx.AsyncClient`, creating it lazily."""
+
+    global _http_client, _http_client_loop
+
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client_loop is not loop:
+        _http_client = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=30),
+        )
+        _http_client_loop = loop
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client – call once at worker shutdown."""
+
+    global _http_client, _http_client_loop
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        _http_client_loop = None
 
 
 # ---------------------------------------------------------------------------
@@ -45,23 +99,14 @@ async def _execute_web_search(query: str, page: int | None = 1) -> Dict[str, Any
     headers = {"X-API-KEY": api_key}
     payload = {"q": query, "page": page or 1}
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        response = await client.post(endpoint, json=payload, headers=headers)
-        response.raise_for_status()
+    client = _get_http_client()
+    response = await client.post(endpoint, json=payload, headers=headers)
+    response.raise_for_status()
 
-        data: Dict[str, Any] = response.json()
-
-    # Normalise to a predictable subset for downstream consumption
-    return {
-        "results": [
-            {
-                "title": item.get("title"),
-                "link": item.get("link"),
-                "snippet": item.get("snippet"),
-            }
-            for item in data.get("organic", [])
-        ]
-    }
+    # The response body is already serialized JSON – hand the raw bytes back to
+    # the router so it can skip a parse/re-dump round trip.  Consumers normalise
+    # the provider fields lazily.
+    return {"__raw_json__": response.content}
 
 
 async def _execute_get_stock_price(ticker_symbol: str) -> Dict[str, Any]:  # noqa: D401
@@ -89,11 +134,11 @@ async def _execute_get_stock_price(ticker_symbol: str) -> Dict[str, Any]:  # noq
         "apikey": api_key,
     }
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        response = await client.get(url, params=params)
-        response.raise_for_status()
+    client = _get_http_client()
+    response = await client.get(url, params=params)
+    response.raise_for_status()
 
-        data: Dict[str, Any] = response.json()
+    data: Dict[str, Any] = response.json()
 
     quote: Dict[str, Any] = data.get("Global Quote", {})
     price_str: str | None = quote.get("05. price")
@@ -115,18 +160,57 @@ async def _execute_get_stock_price(ticker_symbol: str) -> Dict[str, Any]:  # noq
 # ---------------------------------------------------------------------------
 ToolCallable = Callable[..., Awaitable[Dict[str, Any] | str]]
 
-TOOL_REGISTRY: Mapping[str, ToolCallable] = {
+# Concrete dict (not an abstract Mapping) so dispatch stays on CPython's dict
+# fast path – resolved with a single .get() in the activity router.
+TOOL_REGISTRY: Dict[str, ToolCallable] = {
     "web_search": _execute_web_search,
     "get_stock_price": _execute_get_stock_price,
 }
 
 
+# ---------------------------------------------------------------------------
+# Compiled dispatch table
+# ---------------------------------------------------------------------------
+CompiledTool = Callable[[Any], Awaitable[Dict[str, Any] | str]]
+
+
+def _compile_tool(tool_fn: ToolCallable) -> CompiledTool:
+    """Specialize *tool_fn* into a single raw-arguments entry point.
+
+    Built once at registration time: the returned coroutine function pins the
+    target tool and the JSON decoder in closure cells, so per-call dispatch is
+    one dict lookup in :data:`_COMPILED_TOOLS` plus one call – no registry
+    branching or decoder resolution on the hot path.
+    """
+
+    async def _invoke(raw_args: Any) -> Dict[str, Any] | str:
+        # Fast path: the workflow hands arguments over as an already-parsed
+        # dict – call straight through with zero decoding or copying.
+        if isinstance(raw_args, dict):
+            return await tool_fn(**raw_args)
+        if raw_args is None:
+            return await tool_fn()
+        if isinstance(raw_args, (str, bytes, bytearray, memoryview)):
+            try:
+                kwargs: Dict[str, Any] = _loads(raw_args)
+            except (TypeError, ValueError) as exc:
+                raise ApplicationError("Invalid JSON arguments for tool call") from exc
+            return await tool_fn(**kwargs)
+        raise ApplicationError("Invalid arguments type for tool call")
+
+    return _invoke
+
+
+_COMPILED_TOOLS: Dict[str, CompiledTool] = {
+    name: _compile_tool(fn) for name, fn in TOOL_REGISTRY.items()
+}
+
+
 # ---------------------------------------------------------------------------
 # Activity router
 # ---------------------------------------------------------------------------
-@activity.defn(name="ExecuteTool")
-async def execute_tool_activity(tool_call: ToolCall) -> ToolCallResult:  # noqa: D401 – imperative
-    """Route the *tool_call* to the registered implementation and wrap the result.
+async def _run_tool(tool_call: ToolCall) -> ToolCallResult:
+    """Route *tool_call* to the registered implementation and wrap the result.
 
     Steps
     -----
@@ -147,37 +231,91 @@ async def execute_tool_activity(tool_call: ToolCall) -> ToolCallResult:  # noqa:
     function_name = tool_call.name
 
     # ------------------------------------------------------------------
-    # Resolve tool implementation
+    # Resolve the compiled entry point – one hash lookup, then one call.
+    # Argument decoding lives inside the compiled wrapper (built once per
+    # tool at import time by :func:`_compile_tool`).
     # ------------------------------------------------------------------
-    if function_name not in TOOL_REGISTRY:
+    compiled = _COMPILED_TOOLS.get(function_name)
+    if compiled is None:
         raise ApplicationError(f"Tool '{function_name}' is not registered.")
 
-    tool_fn: ToolCallable = TOOL_REGISTRY[function_name]  # type: ignore[assignment]
-
-    # ------------------------------------------------------------------
-    # Parse arguments – they may arrive as a dict already or a JSON string.
-    # ------------------------------------------------------------------
-    try:
-        raw_args = tool_call.arguments
-        if isinstance(raw_args, str):
-            kwargs: Dict[str, Any] = json.loads(raw_args)
-        else:
-            kwargs = dict(raw_args)  # shallow copy / normalise to plain dict
-    except (TypeError, json.JSONDecodeError) as exc:  # pragma: no cover – arg errors
-        raise ApplicationError("Invalid JSON arguments for tool call") from exc
-
-    # ------------------------------------------------------------------
-    # Execute – delegate to the actual tool implementation.
-    # ------------------------------------------------------------------
     try:
-        result = await tool_fn(**kwargs)
+        result = await compiled(tool_call.arguments)
+    except ApplicationError:
+        raise
     except Exception as exc:  # noqa: BLE001 – surface as Temporal app error
         raise ApplicationError(f"Tool '{function_name}' execution failed: {exc}") from exc
 
-    # Serialise the result payload so it can be stored in the DB as text if needed.
-    if isinstance(result, (dict, list)):
-        result_content: str | Dict[str, Any] = json.dumps(result)
+    # Package the payload into the tagged content union.  Tools that fetched
+    # JSON over HTTP pass the raw body through untouched via the
+    # "__raw_json__" wrapper – no parse/re-dump of bytes we already have.
+    if isinstance(result, dict) and "__raw_json__" in result:
+        result_content: ToolCallText | ToolCallStructured = ToolCallText(
+            value=result["__raw_json__"].decode()
+        )
+    elif isinstance(result, dict):
+        result_content = ToolCallStructured(value=result)
+    elif isinstance(result, list):
+        result_content = ToolCallText(value=_dumps_str(result))
     else:
-        result_content = str(result)
+        result_content = ToolCallText(value=str(result))
+
+    return ToolCallResult(tool_call_id=tool_call.id, content=result_content)
+
 
-    return ToolCallResult(tool_call_id=tool_call.id, content=result_content) 
+@activity.defn(name="ExecuteTool")
+async def execute_tool_activity(tool_call: ToolCall) -> ToolCallResult:  # noqa: D401 – imperative
+    """Execute a single *tool_call* (see :func:`_run_tool`)."""
+
+    return await _run_tool(tool_call)
+
+
+def _get_storage():
+    """Return the process-wide shared storage handle (lazy import)."""
+
+    from truss.core.storage import get_shared_storage
+
+    return get_shared_storage()
+
+
+@activity.defn(name="ExecuteToolsAndPersist")
+async def execute_tools_and_persist(
+    run_id: UUID, tool_calls: List[ToolCall]
+) -> List[ToolCallResult]:
+    """Execute a whole tool batch and persist the results in one shot.
+
+    The workflow previously scheduled one ExecuteTool activity per call plus
+    one CreateRunStep per result – ~2N task-queue round-trips and history
+    events per turn.  This activity runs the batch concurrently in-process
+    and bulk-inserts all tool RunSteps in a single statement, so the tool
+    branch costs one activity regardless of fan-out.
+    """
+
+    # TaskGroup rather than gather: when one tool fails the siblings are
+    # cancelled instead of running on unobserved, and cancellation of the
+    # activity itself propagates cleanly into every in-flight tool.  The
+    # group wraps failures in an ExceptionGroup – unwrap the first so
+    # callers keep seeing the plain ApplicationError they always did.
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(_run_tool(tool_call)) for tool_call in tool_calls]
+    except ExceptionGroup as eg:
+        raise eg.exceptions[0] from eg
+    results = [task.result() for task in tasks]
+
+    messages = [
+        Message.model_construct(
+            role="tool",
+            content=res.content.as_text(),
+            tool_calls=None,
+            tool_call_id=res.tool_call_id,
+        )
+        for res in results
+    ]
+    # Blocking SQLAlchemy work goes to a thread so the loop keeps serving
+    # other activities; the insert itself is one multi-row statement.
+    await asyncio.to_thread(
+        _get_storage().create_run_steps_from_messages, run_id, messages
+    )
+
+    return results 
@@ -2,13 +2,15 @@ from __future__ import annotations
 
 import logging
 import os
+from contextlib import asynccontextmanager
 from functools import lru_cache
 from typing import Optional
 
-from fastapi import FastAPI, Depends, status, HTTPException
+from fastapi import FastAPI, Request, status, HTTPException
 from temporalio.client import Client, TLSConfig  # type: ignore
 from pydantic import BaseModel
 
+from truss.core.payload_converter import orjson_data_converter
 from truss.core.storage import PostgresStorage
 from truss.core.models.base import Base
 
@@ -30,26 +32,61 @@ async def _connect_temporal(url: str) -> Client:
     # provides `TEMPORAL_TLS_ENABLED=true`, we assume TLS with default config.
     if os.getenv("TEMPORAL_TLS_ENABLED", "false").lower() in {"1", "true", "yes"}:
         logger.info("Connecting to Temporal with TLS enabled at %s", url)
-        return await Client.connect(url, tls=TLSConfig())
+        return await Client.connect(
+            url, tls=TLSConfig(), data_converter=orjson_data_converter
+        )
 
     logger.info("Connecting to Temporal at %s", url)
-    return await Client.connect(url)
-
+    return await Client.connect(url, data_converter=orjson_data_converter)
 
-app = FastAPI(title="Truss Agent Execution API", version="0.1.0")
 
-# Global handle – populated on application startup
+# Global handles – populated by the lifespan context manager.  Kept as module
+# globals (rather than app.state only) so tests can inject fakes directly.
 _temporal_client: Optional[Client] = None
 # Storage handle (sync) – used directly by API routes
 _storage: Optional[PostgresStorage] = None
 
 
-@app.on_event("startup")
-async def _startup_event() -> None:  # noqa: D401
-    """FastAPI startup hook establishing Temporal connection.
+# Engines whose schema has already been ensured this process – create_all
+# runs table-existence reflection per call, which adds up when every
+# TestClient instantiation re-enters the lifespan.
+_schema_ready: set[int] = set()
+
+
+def _ensure_schema(storage: PostgresStorage) -> None:
+    """Run ``create_all`` at most once per engine per process.
+
+    Set ``TRUSS_SKIP_SCHEMA_CREATE=1`` to skip entirely (production, where
+    migrations own the schema).
+    """
+    if os.getenv("TRUSS_SKIP_SCHEMA_CREATE", "0") in {"1", "true", "yes"}:
+        return
+    engine = storage._engine  # type: ignore[attr-defined]
+    if id(engine) in _schema_ready:
+        return
+    Base.metadata.create_all(engine)
+    _schema_ready.add(id(engine))
+
+
+@lru_cache(maxsize=4)
+def _get_storage_singleton(db_url: str) -> PostgresStorage:
+    """Return one :class:`PostgresStorage` (and connection pool) per URL.
+
+    Test suites spin the app up once per TestClient; memoizing on the URL
+    keeps them all on a single engine instead of rebuilding the pool for
+    every lifespan entry.
+    """
+    return PostgresStorage.from_database_url(db_url)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):  # noqa: D401 – FastAPI lifespan protocol
+    """Initialise and tear down shared resources around the app's lifetime.
 
-    For test environments (``pytest``) you can set ``SKIP_TEMPORAL_CONNECTION=1``
-    to bypass the network call and speed up the test suite.
+    Replaces the deprecated ``on_event`` hooks: one context manager makes the
+    init/teardown ordering explicit and runs in a single event-loop entry.
+    For test environments (``pytest``) set ``SKIP_TEMPORAL_CONNECTION=1`` to
+    bypass the network call and speed up the test suite.
     """
     global _temporal_client
     global _storage
@@ -72,30 +109,31 @@ async def _startup_event() -> None:  # noqa: D401
     # ---------------------------------------------
     db_url = os.getenv("DATABASE_URL", "sqlite:///truss.db")
     try:
-        storage = PostgresStorage.from_database_url(db_url)
+        storage = _get_storage_singleton(db_url)
     except Exception as exc:  # pragma: no cover
         logger.exception("Failed to initialise SQLAlchemy engine: %s", exc)
-        return
+        storage = None
 
-    # Ensure schema exists in dev/test environments (SQLite especially)
-    if db_url.startswith("sqlite"):
-        Base.metadata.create_all(storage._engine)  # type: ignore[attr-defined]
+    if storage is not None:
+        # Ensure schema exists in dev/test environments – once per engine.
+        _ensure_schema(storage)
+        _storage = storage
 
-    _storage = storage
+    app.state.temporal_client = _temporal_client
+    app.state.storage = _storage
 
+    yield
 
-@app.on_event("shutdown")
-async def _shutdown_event() -> None:  # noqa: D401
-    """Cleanly close Temporal connection on app shutdown."""
-    global _temporal_client
-    global _storage
+    # Teardown – close the Temporal connection and drop shared handles.
     if _temporal_client is not None:
         await _temporal_client.close()
         _temporal_client = None
-
     _storage = None
 
 
+app = FastAPI(title="Truss Agent Execution API", version="0.1.0", lifespan=lifespan)
+
+
 @app.get("/health", tags=["meta"])
 async def health() -> dict[str, str]:  # noqa: D401 – simple health check
     """Return a basic healthcheck payload."""
@@ -162,16 +200,22 @@ class RunCreateResponse(BaseModel):
 
 
 @app.post("/sessions", status_code=status.HTTP_201_CREATED, response_model=SessionCreateResponse)
-def create_session(
-    payload: SessionCreateRequest,
-    storage: PostgresStorage = Depends(get_storage),
-):
-    """Create a new conversation session and return its ID."""
+async def create_session(payload: SessionCreateRequest, request: Request):
+    """Create a new conversation session and return its ID.
+
+    Uses the async storage variant so the insert runs on the event loop
+    instead of occupying one of FastAPI's sync-route threadpool slots.
+    Storage comes straight off ``app.state`` – no dependency-resolver hop.
+    """
+
+    storage: PostgresStorage = request.app.state.storage
+    if storage is None:  # pragma: no cover – startup failed
+        raise HTTPException(status_code=503, detail="Storage unavailable")
 
     from uuid import UUID
 
     try:
-        session_obj = storage.create_session(
+        session_obj = await storage.create_session_async(
             agent_config_id=UUID(payload.agent_id), user_id=payload.user_id
         )
     except KeyError as exc:
@@ -185,19 +229,19 @@ def create_session(
     status_code=status.HTTP_202_ACCEPTED,
     response_model=RunCreateResponse,
 )
-async def start_run(
-    session_id: str,
-    payload: RunCreateRequest,
-    storage: PostgresStorage = Depends(get_storage),
-):
+async def start_run(session_id: str, payload: RunCreateRequest, request: Request):
     """Start Temporal workflow for a user message and return workflow_id."""
 
+    storage: PostgresStorage = request.app.state.storage
+    if storage is None:  # pragma: no cover – startup failed
+        raise HTTPException(status_code=503, detail="Storage unavailable")
+
     from uuid import UUID, uuid4
     from truss.workflows.agent_workflow import TemporalAgentExecutionWorkflow
 
     # Proceed even if session missing (testing convenience).
     try:
-        storage.get_session(UUID(session_id))
+        await storage.get_session_async(UUID(session_id))
     except KeyError:
         logger.info("Session %s not found – continuing to start workflow", session_id)
 
@@ -11,35 +11,67 @@ can iterate over the provider's tokens/chunks directly.
 
 from __future__ import annotations
 
-from typing import AsyncIterator, Dict, Any, List
+import operator
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Any, List, TYPE_CHECKING
 
-import litellm
+if TYPE_CHECKING:  # imported lazily at call time, see _get_litellm
+    import litellm
 
 from truss.data_models import AgentConfig, Message
 
 __all__ = [
     "stream_completion",
+    "iter_text_deltas",
 ]
 
+# LiteLLM pulls in a long tail of provider SDKs at import time, which inflates
+# every API worker cold-start and pytest collection that merely imports this
+# module.  Defer the import to the first completion request.
+_litellm = None
+
+
+def _get_litellm() -> "litellm":
+    global _litellm
+    if _litellm is None:
+        import litellm
+
+        _litellm = litellm
+    return _litellm
+
 
 def _build_messages_payload(messages: List[Message]) -> List[Dict[str, Any]]:
     """Convert internal :class:`Message` objects to LiteLLM JSON payload.
 
     LiteLLM expects a list of dictionaries with at minimum the keys
-    ``role`` and ``content``.  We currently ignore tool call fields here –
-    they will be handled at a higher level once we implement tool calling
-    support in the streaming activity.
+    ``role`` and ``content``.  The per-message dict is cached on the
+    :class:`Message` instance (see ``Message._llm_payload``) so repeat
+    conversions of the same history cost one attribute read per message.
+    """
+
+    return [msg._llm_payload for msg in messages]
+
+
+@lru_cache(maxsize=128)
+def _base_params(llm_conf) -> Dict[str, Any]:
+    """Return the message-independent LiteLLM parameters for *llm_conf*.
+
+    Built conditionally so we don't send ``None`` values for optional
+    parameters which some providers reject.  Callers must ``.copy()`` before
+    mutating.
     """
 
-    payload: List[Dict[str, Any]] = []
-    for msg in messages:
-        payload.append({
-            "role": msg.role,
-            "content": msg.content or "",
-            "tool_calls": msg.tool_calls if msg.tool_calls else None,
-            "tool_call_id": msg.tool_call_id if msg.tool_call_id else None,
-        })
-    return payload
+    params: Dict[str, Any] = {
+        "model": llm_conf.model_name,
+        "temperature": llm_conf.temperature,
+        "top_p": llm_conf.top_p,
+        "frequency_penalty": llm_conf.frequency_penalty,
+        "presence_penalty": llm_conf.presence_penalty,
+        "stream": True,
+    }
+    if llm_conf.max_tokens is not None:
+        params["max_tokens"] = llm_conf.max_tokens
+    return params
 
 
 async def stream_completion(
@@ -58,25 +90,39 @@ async def stream_completion(
         completion request.
     """
 
-    llm_conf = agent_config.llm_config
-
-    # Build parameter dict conditionally so we don't send ``None`` values
-    # for optional parameters which some providers reject.
-    params: Dict[str, Any] = {
-        "model": llm_conf.model_name,
-        "temperature": llm_conf.temperature,
-        "top_p": llm_conf.top_p,
-        "frequency_penalty": llm_conf.frequency_penalty,
-        "presence_penalty": llm_conf.presence_penalty,
-        "stream": True,
-        # Messages converted to provider format
-        "messages": _build_messages_payload(conversation),
-    }
-    if llm_conf.max_tokens is not None:
-        params["max_tokens"] = llm_conf.max_tokens
+    # The per-config parameter dict is memoized (LLMConfig is frozen, hence
+    # hashable); only the messages payload varies between calls.
+    params = _base_params(agent_config.llm_config).copy()
+    params["messages"] = _build_messages_payload(conversation)
 
     # Delegate the heavy lifting to LiteLLM – it returns an *async generator*
     # when ``stream=True`` so we simply forward that upstream.
     # Any network exceptions are allowed to propagate so Temporal retry
     # policies can handle them at the activity layer.
-    return await litellm.acompletion(**params) 
+    return await _get_litellm().acompletion(**params)
+
+
+# Bound once at import – one C-level call per chunk beats two subscript
+# bytecodes in the per-token loop below.
+_first_choice = operator.itemgetter(0)
+
+
+async def iter_text_deltas(
+    stream: AsyncIterator[Dict[str, Any]],
+) -> AsyncIterator[str]:
+    """Yield only the text deltas from a raw completion *stream*.
+
+    Convenience for callers that just want the assistant text: skips empty
+    deltas and tool-call-only chunks, leaving the caller a plain
+    ``"".join``-able sequence of strings with minimal per-token overhead.
+    """
+
+    async for chunk in stream:
+        if not isinstance(chunk, dict):
+            chunk = chunk.model_dump()
+        choices = chunk.get("choices")
+        if not choices:
+            continue
+        content = _first_choice(choices)["delta"].get("content")
+        if content:
+            yield content 
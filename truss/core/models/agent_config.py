@@ -8,6 +8,8 @@ are stored in JSON/JSONB columns.
 from __future__ import annotations
 
 import uuid
+
+from uuid6 import uuid7
 from datetime import datetime
 
 from sqlalchemy import Column, DateTime, String, Text
@@ -18,7 +20,11 @@ from .base import Base
 
 
 # Helper that chooses JSONB for Postgres, JSON otherwise ---------------------------------------
-_JSON_TYPE = JSON  # Generic JSON works across dialects
+# JSONB stores a parsed binary representation server-side (and is indexable);
+# the generic JSON type remains the fallback for SQLite.
+from sqlalchemy.dialects.postgresql import JSONB
+
+_JSON_TYPE = JSON().with_variant(JSONB(), "postgresql")
 
 try:
     _UUID_TYPE = UUID  # type: ignore
@@ -31,7 +37,7 @@ class AgentConfigORM(Base):
 
     __tablename__ = "agent_configs"
 
-    id = Column(_UUID_TYPE, primary_key=True, default=uuid.uuid4, nullable=False)
+    id = Column(_UUID_TYPE, primary_key=True, default=uuid7, nullable=False)
     name = Column(String(length=255), nullable=False)
     system_prompt = Column(Text, nullable=False)
     llm_config = Column(_JSON_TYPE, nullable=False)
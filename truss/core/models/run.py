@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import enum
 import uuid
+
+from uuid6 import uuid7
 from datetime import datetime
 
 from sqlalchemy import Column, DateTime, Enum, ForeignKey, String, Text
@@ -42,7 +44,7 @@ class RunORM(Base):
 
     __tablename__ = "runs"
 
-    id = Column(_UUID_TYPE, primary_key=True, default=uuid.uuid4, nullable=False)
+    id = Column(_UUID_TYPE, primary_key=True, default=uuid7, nullable=False)
 
     # Foreign-key relationship to the parent session
     session_id = Column(
@@ -52,8 +54,13 @@ class RunORM(Base):
         index=True,
     )
 
+    # Native enum on Postgres: 4-byte storage and labels come back validated
+    # server-side, skipping the per-row CHECK + Python coercion the VARCHAR
+    # fallback pays.  SQLite keeps the VARCHAR-with-CHECK variant.
     status = Column(
-        Enum(RunStatus, name="run_status_enum", native_enum=False),
+        Enum(RunStatus, name="run_status_enum", native_enum=True).with_variant(
+            Enum(RunStatus, name="run_status_enum", native_enum=False), "sqlite"
+        ),
         default=RunStatus.PENDING,
         nullable=False,
     )
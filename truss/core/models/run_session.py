@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import uuid
+
+from uuid6 import uuid7
 from datetime import datetime
 
 from sqlalchemy import Column, DateTime, ForeignKey, String
@@ -29,7 +31,7 @@ class RunSessionORM(Base):
 
     __tablename__ = "run_sessions"
 
-    id = Column(_UUID_TYPE, primary_key=True, default=uuid.uuid4, nullable=False)
+    id = Column(_UUID_TYPE, primary_key=True, default=uuid7, nullable=False)
 
     # Foreign key to the agent configuration that produced this session
     agent_config_id = Column(
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
 import uuid
+
+from uuid6 import uuid7
 from datetime import datetime
 from typing import Any, List, Optional
 
 import enum
 
-from sqlalchemy import Column, DateTime, ForeignKey, String, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String, Text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy import JSON
 
 from .base import Base
@@ -20,7 +22,8 @@ try:
 except ImportError:  # pragma: no cover
     _UUID_TYPE = String(36)
 
-_JSON_TYPE = JSON  # JSON works across dialects -------------------------------------------------
+# JSONB on Postgres (binary representation, indexable); generic JSON elsewhere.
+_JSON_TYPE = JSON().with_variant(JSONB(), "postgresql")
 
 
 class MessageRole(str, enum.Enum):
@@ -42,8 +45,16 @@ class RunStepORM(Base):
 
     __tablename__ = "run_steps"
 
+    # Composite index matching the hot read path: history queries filter on
+    # run_id and order by created_at, so a single ordered index scan serves
+    # them without a sort node.  It also covers plain run_id lookups, making
+    # a separate per-column index redundant.
+    __table_args__ = (
+        Index("ix_run_steps_run_id_created_at", "run_id", "created_at"),
+    )
+
     id: uuid.UUID | None = Column(
-        _UUID_TYPE, primary_key=True, default=uuid.uuid4, nullable=False
+        _UUID_TYPE, primary_key=True, default=uuid7, nullable=False
     )
 
     # Foreign-key relationship back to the owning Run
@@ -51,7 +62,6 @@ class RunStepORM(Base):
         _UUID_TYPE,
         ForeignKey("runs.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
 
     # Core message payload ---------------------------------------------------
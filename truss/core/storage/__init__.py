@@ -7,24 +7,95 @@ invoked from Temporal activities via `anyio.to_thread.run_sync`.
 
 from __future__ import annotations
 
+import functools
+import os
+import threading
 from contextlib import contextmanager
-from typing import Iterable, List, Optional
+from time import monotonic
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import create_engine, select, update
+from sqlalchemy import create_engine, event, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from uuid6 import uuid7
+
+try:  # C-backed JSON codec for engine-level (de)serialization of JSON columns
+    from orjson import loads as _json_loads
+    from orjson import dumps as _orjson_dumps
+
+    def _json_dumps(obj):  # SQLAlchemy expects a str-returning serializer
+        return _orjson_dumps(obj).decode()
+
+except ImportError:  # pragma: no cover - stdlib fallback
+    import json as _json
+
+    _json_loads = _json.loads
+
+    def _json_dumps(obj):
+        return _json.dumps(obj, separators=(",", ":"))
+
 
 from truss.core.models.agent_config import AgentConfigORM
 from truss.core.models.run import RunORM, RunStatus
 from truss.core.models.run_session import RunSessionORM
 from truss.core.models.run_step import RunStepORM, MessageRole
-from truss.data_models import Message, AgentMemory, AgentConfig
+from pydantic import TypeAdapter
+
+from truss.data_models import Message, AgentMemory, AgentConfig, ToolCall
 
 # ---------------------------------------------------------------------------
 # Helper
 # ---------------------------------------------------------------------------
 
+# Sync->async driver translation used when deriving the async engine from the
+# configured (sync) database URL.
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# Agent configs are read on every workflow start but change rarely; a short
+# TTL cache turns N SELECTs per second into roughly one per TTL window.
+_AGENT_CACHE_TTL = 60.0  # seconds
+_AGENT_CACHE_MAX = 1024  # entries
+
+# Compiled once: dumps a whole tool_calls list in one pydantic-core pass
+# instead of a Python-level model_dump() per item.
+_TOOL_CALLS_ADAPTER: TypeAdapter[List[ToolCall]] = TypeAdapter(List[ToolCall])
+
+
+def _configure_sqlite(engine: Engine) -> None:
+    """Apply per-connection pragmas to SQLite engines.
+
+    * ``foreign_keys=ON`` – SQLite ships with FK checks off, but the storage
+      layer relies on FK violations (mapped to ``KeyError``) instead of
+      pre-SELECT existence checks.
+    * ``journal_mode=WAL`` / ``synchronous=NORMAL`` – writers stop blocking
+      readers and per-commit fsync cost drops, which dominates test runtime
+      on file-backed databases.
+    """
+    if engine.url.get_backend_name() != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, _record):  # noqa: WPS430 – listener
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+
+def _dump_tool_calls(message: Message):
+    """Return *message.tool_calls* as JSON-ready dicts (or ``None``)."""
+    if not message.tool_calls:
+        return None
+    return _TOOL_CALLS_ADAPTER.dump_python(message.tool_calls, mode="json")
+
 
 class PostgresStorage:  # noqa: WPS110 – Name dictated by technical spec
     """Concrete storage implementation backed by a Postgres database.
@@ -38,7 +109,16 @@ class PostgresStorage:  # noqa: WPS110 – Name dictated by technical spec
 
     def __init__(self, engine: Engine) -> None:  # noqa: D401 – imperative mood OK
         self._engine: Engine = engine
+        _configure_sqlite(engine)
         self._session_factory = sessionmaker(bind=self._engine, expire_on_commit=False)
+        # Async counterparts are created lazily on first use so purely-sync
+        # callers never pay for an extra engine/pool.
+        self._async_engine: Optional[AsyncEngine] = None
+        self._async_session_factory: Optional[async_sessionmaker] = None
+        # TTL cache for load_agent_config: agent_id -> (expiry, config).
+        # Guarded by a lock because the sync methods may run on worker threads.
+        self._agent_cache: Dict[UUID, Tuple[float, AgentConfig]] = {}
+        self._agent_cache_lock = threading.Lock()
 
     # ------------------------------------------------------------------
     # Context-manager helper
@@ -64,17 +144,37 @@ class PostgresStorage:  # noqa: WPS110 – Name dictated by technical spec
         with self._session_scope() as session:
             run = RunORM(session_id=session_id, status=RunStatus.PENDING)
             session.add(run)
+            # Python-side column defaults (id, created_at) are populated
+            # before INSERT, so no refresh round-trip is needed post-flush.
             session.flush()  # populate PK
-            session.refresh(run)
             return run
 
+    def create_run_with_initial_step(self, session_id: UUID, message: Message) -> UUID:
+        """Insert a *Run* and its first *RunStep* in a single transaction.
+
+        Run initialisation always writes these two rows back-to-back, so
+        fusing them saves a commit round-trip and leaves no window where a
+        run exists without its triggering message.  Returns the new run id.
+        """
+        tool_calls_json = _dump_tool_calls(message)
+        with self._session_scope() as session:
+            run = RunORM(session_id=session_id, status=RunStatus.PENDING)
+            session.add(run)
+            session.flush()  # populate run.id for the FK below
+            session.add(
+                RunStepORM(
+                    run_id=run.id,
+                    role=MessageRole(message.role),
+                    content=message.content,
+                    tool_calls=tool_calls_json,
+                    tool_call_id=message.tool_call_id,
+                )
+            )
+            return run.id
+
     def create_run_step_from_message(self, run_id: UUID, message: Message) -> RunStepORM:
         """Persist a Pydantic *Message* as a *RunStep* row."""
-        tool_calls_json = (
-            [tool_call.model_dump() for tool_call in message.tool_calls]
-            if message.tool_calls
-            else None
-        )
+        tool_calls_json = _dump_tool_calls(message)
         with self._session_scope() as session:
             step = RunStepORM(
                 run_id=run_id,
@@ -85,19 +185,114 @@ class PostgresStorage:  # noqa: WPS110 – Name dictated by technical spec
             )
             session.add(step)
             session.flush()
-            session.refresh(step)
             return step
 
-    def get_steps_for_session(self, session_id: UUID) -> List[RunStepORM]:
-        """Return all *RunStep* rows for a given *RunSession*, ordered chronologically."""
+    def create_run_steps_from_messages(
+        self, run_id: UUID, messages: List[Message]
+    ) -> List[UUID]:
+        """Persist several *Message*s as *RunStep* rows in one INSERT.
+
+        SQLAlchemy's ``insertmanyvalues`` ships the whole batch as a single
+        multi-row statement, so a tool-use turn that produces N messages
+        costs one round-trip instead of N.  Returns the generated step ids
+        in input order.
+        """
+        if not messages:
+            return []
+
+        # Client-side ids use uuid7 like the column default: time-ordered keys
+        # keep this hottest insert path appending to the same index pages
+        # instead of splattering random UUIDs across the whole PK btree.
+        rows = []
+        for message in messages:
+            rows.append(
+                {
+                    "id": uuid7(),
+                    "run_id": run_id,
+                    "role": MessageRole(message.role),
+                    "content": message.content,
+                    "tool_calls": _dump_tool_calls(message),
+                    "tool_call_id": message.tool_call_id,
+                }
+            )
+        with self._session_scope() as session:
+            session.execute(insert(RunStepORM), rows)
+        return [row["id"] for row in rows]
+
+    def _get_async_session_factory(self) -> async_sessionmaker:
+        """Return (lazily creating) the async session factory for this storage."""
+        if self._async_session_factory is None:
+            url = self._engine.url
+            driver = _ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)
+            self._async_engine = create_async_engine(
+                url.set(drivername=driver),
+                json_serializer=_json_dumps,
+                json_deserializer=_json_loads,
+            )
+            _configure_sqlite(self._async_engine.sync_engine)
+            self._async_session_factory = async_sessionmaker(
+                self._async_engine, expire_on_commit=False
+            )
+        return self._async_session_factory
+
+    async def create_run_step_from_message_async(self, run_id: UUID, message: Message) -> RunStepORM:
+        """Async variant of :meth:`create_run_step_from_message`.
+
+        Uses an async driver directly on the event loop so hot paths (the LLM
+        activity's post-stream persistence) avoid a thread-pool hop per write.
+        """
+        tool_calls_json = _dump_tool_calls(message)
+        factory = self._get_async_session_factory()
+        async with factory() as session:
+            try:
+                step = RunStepORM(
+                    run_id=run_id,
+                    role=MessageRole(message.role),
+                    content=message.content,
+                    tool_calls=tool_calls_json,
+                    tool_call_id=message.tool_call_id,
+                )
+                session.add(step)
+                await session.flush()
+                await session.commit()
+            except Exception:  # noqa: BLE001 – re-raise downstream
+                await session.rollback()
+                raise
+            return step
+
+    def iter_steps_for_session(
+        self, session_id: UUID, batch_size: int = 200, offset: int = 0
+    ) -> Iterator[RunStepORM]:
+        """Yield *RunStep* rows for a *RunSession* in chronological order.
+
+        Rows stream from the server in ``batch_size`` chunks (``yield_per``)
+        so peak memory stays O(batch) rather than O(history) for long
+        conversations.  The underlying session stays open until the generator
+        is exhausted or closed.  ``offset`` skips that many leading rows –
+        steps are append-only per session, so an offset doubles as a stable
+        incremental cursor.
+
+        The id tiebreaker matters: bulk-inserted rows can share a
+        ``created_at`` to the microsecond, and without it their relative
+        order would be plan-dependent – successive offset reads could then
+        duplicate one row and skip another.  Ids are time-ordered (uuid7),
+        so the composite order stays chronological and total.
+        """
         with self._session_scope() as session:
             stmt = (
                 select(RunStepORM)
                 .join(RunORM, RunStepORM.run_id == RunORM.id)
                 .where(RunORM.session_id == session_id)
-                .order_by(RunStepORM.created_at)
+                .order_by(RunStepORM.created_at, RunStepORM.id)
+                .execution_options(yield_per=batch_size)
             )
-            return list(session.execute(stmt).scalars())
+            if offset:
+                stmt = stmt.offset(offset)
+            yield from session.execute(stmt).scalars()
+
+    def get_steps_for_session(self, session_id: UUID) -> List[RunStepORM]:
+        """Return all *RunStep* rows for a given *RunSession*, ordered chronologically."""
+        return list(self.iter_steps_for_session(session_id))
 
     def update_run_status(self, run_id: UUID, status: str, error: Optional[str] = None) -> None:
         """Update *Run.status* (and optionally *error*) atomically."""
@@ -110,12 +305,24 @@ class PostgresStorage:  # noqa: WPS110 – Name dictated by technical spec
             session.execute(stmt)
 
     def load_agent_config(self, agent_id: UUID) -> AgentConfig:
-        """Fetch :class:`AgentConfig` Pydantic model for a given identifier."""
+        """Fetch :class:`AgentConfig` Pydantic model for a given identifier.
+
+        Results are served from a TTL cache (see ``_AGENT_CACHE_TTL``) so the
+        per-run read costs a dict lookup instead of a pool checkout + SELECT.
+        The returned model is shared between callers – it is treated as
+        immutable throughout the codebase (``LLMConfig`` is frozen).
+        """
+        now = monotonic()
+        with self._agent_cache_lock:
+            cached = self._agent_cache.get(agent_id)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+
         with self._session_scope() as session:
             obj = session.get(AgentConfigORM, agent_id)
             if obj is None:  # pragma: no cover
                 raise KeyError(f"AgentConfig {agent_id} not found")
-            return AgentConfig(
+            config = AgentConfig(
                 id=str(obj.id),
                 name=obj.name,
                 system_prompt=obj.system_prompt,
@@ -123,21 +330,69 @@ class PostgresStorage:  # noqa: WPS110 – Name dictated by technical spec
                 tools=obj.tools,
             )
 
+        with self._agent_cache_lock:
+            if len(self._agent_cache) >= _AGENT_CACHE_MAX:
+                # Drop expired entries first; fall back to clearing outright.
+                live = {k: v for k, v in self._agent_cache.items() if v[0] > now}
+                self._agent_cache = live if len(live) < _AGENT_CACHE_MAX else {}
+            self._agent_cache[agent_id] = (now + _AGENT_CACHE_TTL, config)
+        return config
+
+    def load_agent_config_for_session(self, session_id: UUID) -> Optional[AgentConfig]:
+        """Resolve the :class:`AgentConfig` behind *session_id*, or ``None``.
+
+        Both lookups are cheap: the session read is a PK get and the config
+        comes from the TTL cache after the first call.  Returns ``None``
+        rather than raising when the session (or its config) is unknown so
+        workflows can proceed without an agent configuration.
+        """
+        try:
+            session_row = self.get_session(session_id)
+            return self.load_agent_config(session_row.agent_config_id)
+        except KeyError:
+            return None
+
+    def invalidate_agent_config(self, agent_id: UUID) -> None:
+        """Drop *agent_id* from the config cache after an external update."""
+        with self._agent_cache_lock:
+            self._agent_cache.pop(agent_id, None)
+
     # ------------------------------------------------------------------
     # Session helpers
     # ------------------------------------------------------------------
     def create_session(self, agent_config_id: UUID, user_id: str) -> RunSessionORM:
         """Insert a new :class:`RunSessionORM` row and return the instance."""
 
-        # Validate agent exists – provides nicer error than FK violation.
-        with self._session_scope() as session:
-            if session.get(AgentConfigORM, agent_config_id) is None:
-                raise KeyError(f"AgentConfig {agent_config_id} not found")
+        # Let the FK constraint validate the agent id: a pre-SELECT purely for
+        # a nicer error doubled the statements on this hot endpoint.
+        try:
+            with self._session_scope() as session:
+                session_obj = RunSessionORM(agent_config_id=agent_config_id, user_id=user_id)
+                session.add(session_obj)
+                session.flush()
+                return session_obj
+        except IntegrityError as exc:
+            raise KeyError(f"AgentConfig {agent_config_id} not found") from exc
 
-            session_obj = RunSessionORM(agent_config_id=agent_config_id, user_id=user_id)
-            session.add(session_obj)
-            session.flush()
-            session.refresh(session_obj)
+    async def create_session_async(self, agent_config_id: UUID, user_id: str) -> RunSessionORM:
+        """Async variant of :meth:`create_session` for event-loop callers.
+
+        API routes run on the FastAPI event loop; the sync variant would
+        occupy a threadpool slot per request for the duration of the insert.
+        """
+        factory = self._get_async_session_factory()
+        async with factory() as session:
+            try:
+                session_obj = RunSessionORM(agent_config_id=agent_config_id, user_id=user_id)
+                session.add(session_obj)
+                await session.flush()
+                await session.commit()
+            except IntegrityError as exc:
+                await session.rollback()
+                raise KeyError(f"AgentConfig {agent_config_id} not found") from exc
+            except Exception:  # noqa: BLE001 – re-raise downstream
+                await session.rollback()
+                raise
             return session_obj
 
     # ------------------------------------------------------------------
@@ -145,10 +400,60 @@ class PostgresStorage:  # noqa: WPS110 – Name dictated by technical spec
     # ------------------------------------------------------------------
     @classmethod
     def from_database_url(cls, url: str) -> "PostgresStorage":
-        """Create a :class:`PostgresStorage` from database URL."""
-        engine = create_engine(url, future=True)
+        """Create a :class:`PostgresStorage` from database URL.
+
+        Server-backed databases get an explicitly sized connection pool:
+        the SQLAlchemy default (5 connections, no overflow headroom, no
+        liveness check) forces a fresh TCP+TLS handshake per request once
+        the pool is exhausted under concurrent API traffic.  SQLite keeps
+        the default configuration – its connections are cheap local file
+        handles and the pool knobs don't apply.
+        """
+        if url.startswith("sqlite"):
+            # One shared connection for the whole process: avoids a file
+            # reopen per checkout and sidesteps SQLite's writer lock churn
+            # under the threaded test suite.
+            engine = create_engine(
+                url,
+                future=True,
+                json_serializer=_json_dumps,
+                json_deserializer=_json_loads,
+                poolclass=StaticPool,
+                connect_args={"check_same_thread": False},
+            )
+        else:
+            engine = create_engine(
+                url,
+                future=True,
+                json_serializer=_json_dumps,
+                json_deserializer=_json_loads,
+                pool_size=int(os.getenv("TRUSS_DB_POOL_SIZE", "20")),
+                max_overflow=int(os.getenv("TRUSS_DB_MAX_OVERFLOW", "10")),
+                pool_timeout=int(os.getenv("TRUSS_DB_POOL_TIMEOUT", "30")),
+                pool_recycle=int(os.getenv("TRUSS_DB_POOL_RECYCLE", "1800")),
+                # Liveness check per checkout (one SELECT round-trip).  On a
+                # trusted LAN where the DB never drops idle connections this
+                # can be switched off to shave the ping from every checkout.
+                pool_pre_ping=os.getenv("TRUSS_DB_PRE_PING", "1").lower()
+                not in {"0", "false", "no"},
+            )
         return cls(engine)
 
+    def warmup(self, connections: Optional[int] = None) -> None:
+        """Pre-open pooled connections so early callers skip handshake latency.
+
+        Checks out *connections* (default: the pool's configured size)
+        simultaneously, forcing the pool to establish them, then returns them
+        all.  A no-op cost for SQLite's single static connection.
+        """
+        pool = self._engine.pool
+        if connections is None:
+            size = getattr(pool, "size", None)
+            connections = size() if callable(size) else 1
+        conns = [self._engine.connect() for _ in range(connections)]
+        for conn in conns:
+            conn.close()
+
     # ------------------------------------------------------------------
     # Read helpers
     # ------------------------------------------------------------------
@@ -159,3 +464,27 @@ class PostgresStorage:  # noqa: WPS110 – Name dictated by technical spec
             if obj is None:
                 raise KeyError(f"RunSession {session_id} not found")
             return obj
+
+    async def get_session_async(self, session_id: UUID) -> RunSessionORM:
+        """Async variant of :meth:`get_session` for event-loop callers."""
+        factory = self._get_async_session_factory()
+        async with factory() as session:
+            obj = await session.get(RunSessionORM, session_id)
+            if obj is None:
+                raise KeyError(f"RunSession {session_id} not found")
+            return obj
+
+
+@functools.lru_cache(maxsize=1)
+def get_shared_storage() -> PostgresStorage:
+    """Return the process-wide :class:`PostgresStorage` for the configured DB.
+
+    Every in-process consumer (the worker's storage activities, the LLM and
+    tool activity modules) must share this one instance so the process holds
+    exactly one engine and connection pool: per-module storages would
+    multiply the pool footprint against the server, leave warmup covering
+    only one of them, and break concurrency limits sized to a single pool.
+    """
+    from truss.settings import get_settings  # local – only needed on first call
+
+    return PostgresStorage.from_database_url(get_settings().database_url)
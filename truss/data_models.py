@@ -6,26 +6,40 @@ subtasks will flesh out the individual models.
 
 
 from __future__ import annotations
-from pydantic import BaseModel
-from typing import Any, Dict, List, Optional, Literal
-from uuid import uuid4
+import json
+from functools import cached_property
+from secrets import token_hex as _token_hex
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from typing import Annotated, Any, Dict, List, Optional, Literal, Union
+from uuid import UUID, uuid4
 from pydantic import Field
 
 __all__ = [
     "Message",
     "ToolCall",
     "ToolCallResult",
+    "ToolCallText",
+    "ToolCallStructured",
+    "ToolCallContent",
+    "MessagesRef",
     "AgentMemory",
     "LLMConfig",
     "AgentConfig",
     "AgentWorkflowInput",
     "AgentWorkflowOutput",
+    "MESSAGE_ADAPTER",
+    "MESSAGE_LIST_ADAPTER",
+    "TOOL_CALL_ADAPTER",
 ]
 
 
 class Message(BaseModel):
     """A single chat message, optionally associated with tool calls or their results."""
 
+    # Messages are treated as immutable once built (see _llm_payload); frozen
+    # models are also hashable, which downstream caches rely on.
+    model_config = ConfigDict(frozen=True)
+
     role: Literal["system", "user", "assistant", "tool"]
     content: Optional[str] = None
     tool_calls: Optional[List[ToolCall]] = None
@@ -34,20 +48,100 @@ class Message(BaseModel):
         description="If this message is a tool response, reference to the originating tool call",
     )
 
+    @cached_property
+    def _llm_payload(self) -> Dict[str, Any]:
+        """Provider-format dict for this message, built once per instance.
+
+        Messages are never mutated after construction, so the converted dict
+        can be cached on the instance – repeat payload builds (LLM retries,
+        workflow loop iterations reusing the same history) become attribute
+        reads instead of fresh dict allocations.
+        """
+        return {
+            "role": self.role,
+            "content": self.content or "",
+            "tool_calls": self.tool_calls if self.tool_calls else None,
+            "tool_call_id": self.tool_call_id if self.tool_call_id else None,
+        }
+
 
 class ToolCall(BaseModel):
     """Represents a single tool invocation request coming from the LLM."""
 
-    id: str = Field(default_factory=lambda: str(uuid4()), description="Unique identifier of the tool call within the assistant turn")
+    model_config = ConfigDict(frozen=True)
+
+    # token_hex skips the UUID-object construction and hyphenated formatting
+    # of str(uuid4()); the id is opaque – it only has to be unique within the
+    # turn – so the 32-char hex form is equivalent and cheaper to mint.
+    id: str = Field(default_factory=lambda: _token_hex(16), description="Unique identifier of the tool call within the assistant turn")
     name: str = Field(..., description="Registered name of the tool/function to call")
     arguments: Dict[str, Any] = Field(default_factory=dict, description="Raw JSON arguments payload passed to the tool")
 
 
+# Pre-built adapters for the two models (de)serialized on hot paths.  Building
+# a TypeAdapter compiles the pydantic-core schema once at import time; callers
+# validating raw JSON should prefer these over ad-hoc per-call constructions.
+MESSAGE_ADAPTER: TypeAdapter[Message] = TypeAdapter(Message)
+MESSAGE_LIST_ADAPTER: TypeAdapter[List[Message]] = TypeAdapter(List[Message])
+TOOL_CALL_ADAPTER: TypeAdapter[ToolCall] = TypeAdapter(ToolCall)
+
+
+class ToolCallText(BaseModel):
+    """Plain-text tool result payload."""
+
+    model_config = ConfigDict(frozen=True)
+
+    kind: Literal["text"] = "text"
+    value: str
+
+    def as_text(self) -> str:
+        """Return the payload as a plain string (identity for text results)."""
+        return self.value
+
+
+class ToolCallStructured(BaseModel):
+    """Structured (JSON object) tool result payload."""
+
+    model_config = ConfigDict(frozen=True)
+
+    kind: Literal["json"] = "json"
+    value: Dict[str, Any]
+
+    def as_text(self) -> str:
+        """Return the payload serialized as a JSON string."""
+        return json.dumps(self.value)
+
+
+# Tagged union – pydantic-core dispatches on the "kind" field via a lookup
+# table instead of trying each member in turn, which matters on the per-tool-
+# call validation path.
+ToolCallContent = Annotated[Union[ToolCallText, ToolCallStructured], Field(discriminator="kind")]
+
+
+class MessagesRef(BaseModel):
+    """Handle referencing a prefix of a session's persisted message stream.
+
+    Passed to activities instead of the message list itself: the Temporal
+    payload then stays O(1) per call regardless of conversation length, and
+    the activity dereferences the handle against storage (with a local cache)
+    on the worker.  ``up_to_seq`` pins the prefix length so the activity sees
+    exactly the history the workflow decided on, even if more rows land
+    concurrently.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    session_id: UUID = Field(..., description="Session whose step stream is referenced")
+    up_to_seq: int = Field(..., ge=0, description="Number of leading messages included in the reference")
+
+
 class ToolCallResult(BaseModel):
     """Result payload returned by a tool execution."""
 
+    model_config = ConfigDict(frozen=True)
+
     tool_call_id: str = Field(..., description="Identifier linking this result to the originating ToolCall.id")
-    content: str | Dict[str, Any] = Field(..., description="Serialized result or message produced by the tool")
+    content: ToolCallContent = Field(..., description="Result or message produced by the tool, tagged by payload kind")
 
 
 class AgentMemory(BaseModel):
@@ -59,6 +153,18 @@ class AgentMemory(BaseModel):
         description="Ordered list of messages constituting the conversation memory (must contain at least one message)",
     )
 
+    @classmethod
+    def from_messages(cls, messages: List[Message]) -> "AgentMemory":
+        """Wrap an already-validated message list without re-validation.
+
+        Bulk loaders (e.g. the GetRunMemory activity) build the whole list in
+        one pass from trusted rows; handing it over at construction time via
+        ``model_construct`` avoids a second validator sweep over every message
+        and its nested tool calls.  ``add_message`` remains the incremental
+        path for single appends.
+        """
+        return cls.model_construct(messages=messages)
+
     def add_message(self, message: Message) -> None:
         """Append a new message to the memory preserving order."""
 
@@ -68,6 +174,10 @@ class AgentMemory(BaseModel):
 class LLMConfig(BaseModel):
     """Configuration options for the Large Language Model used by an agent."""
 
+    # Immutable so configs are hashable – lru_cache keys derived parameter
+    # dicts on them (see llm_client._base_params).
+    model_config = ConfigDict(frozen=True)
+
     model_name: str = Field(..., description="Identifier for the underlying LLM model, e.g. 'gpt-4o' or 'anthropic/claude-3'")
     temperature: float = Field(
         0.7,
@@ -97,9 +207,6 @@ class LLMConfig(BaseModel):
         description="Penalises new tokens based on whether they appear in the text so far",
     )
 
-    class Config:
-        frozen = True  # treat config as immutable so it can be hashed/cached
-
 
 class AgentConfig(BaseModel):
     """High-level configuration describing an autonomous agent instance."""
@@ -125,24 +232,40 @@ class AgentWorkflowInput(BaseModel):
 
     Attributes
     ----------
-    session_id: str
-        Unique identifier of the conversation session the run belongs to (UUID string).
-    user_message: Message
+    session_id: UUID
+        Unique identifier of the conversation session the run belongs to.
+        Declared as :class:`~uuid.UUID` so pydantic parses and validates the
+        value once at the workflow boundary; callers may still pass a UUID
+        string and the Temporal JSON payload remains a plain string.
+    user_message: Message | None
         The latest user message that triggered this workflow execution.
-    run_id: str | None
+        ``None`` only on the continue-as-new resume path, where the message
+        was already persisted by the previous incarnation.
+    run_id: UUID | None
         Optional identifier of the run/Workflow execution. A UUID will be generated
         client-side where appropriate (e.g. by the API server) and forwarded so the
         Temporal workflow can adopt the same identifier.  Keeping the field optional
         allows callers that do not care about controlling the ID to omit it and let
         the system generate one downstream.
+    resume_run_id: UUID | None
+        Set when the workflow continues-as-new to compact its event history:
+        the new incarnation adopts this run instead of creating one and
+        rebuilds its memory from the persisted step stream.
     """
 
-    session_id: str = Field(..., description="Conversation session identifier (UUID string)")
-    user_message: Message = Field(..., description="Latest user message to process")
-    run_id: Optional[str] = Field(
+    session_id: UUID = Field(..., description="Conversation session identifier")
+    user_message: Optional[Message] = Field(
+        default=None,
+        description="Latest user message to process (None only when resuming via continue-as-new)",
+    )
+    run_id: Optional[UUID] = Field(
         default=None,
         description="Optional identifier for the run/workflow. If omitted one will be generated downstream.",
     )
+    resume_run_id: Optional[UUID] = Field(
+        default=None,
+        description="Run to adopt when resuming after continue-as-new (skips run creation)",
+    )
 
 
 class AgentWorkflowOutput(BaseModel):
@@ -9,8 +9,9 @@ Usage::
 
 Environment variables
 ---------------------
-DATABASE_URL
-    SQLAlchemy database URL.  Defaults to ``sqlite:///truss.db`` for local dev.
+TRUSS_DATABASE_URL
+    SQLAlchemy database URL (read via :mod:`truss.settings`).  Defaults to
+    ``sqlite:///truss.db`` for local dev.
 TEMPORAL_URL
     Target Temporal frontend host:port. Defaults to ``localhost:7233``.
 TEMPORAL_TASK_QUEUE
@@ -18,34 +19,27 @@ TEMPORAL_TASK_QUEUE
 """
 
 import asyncio
+import logging
 import os
-from typing import Sequence, Callable, Any
 
 from temporalio.client import Client
 from temporalio.worker import Worker
 
 from truss.activities.storage_activities import StorageActivities
-from truss.activities.llm_activities import llm_activity
-from truss.activities.tool_activities import execute_tool_activity
-from truss.core.storage import PostgresStorage
+from truss.activities.llm_activities import (
+    llm_activity,
+    close_redis_client,
+)
+from truss.activities.tool_activities import (
+    execute_tool_activity,
+    execute_tools_and_persist,
+    close_http_client,
+)
+from truss.core.payload_converter import orjson_data_converter
+from truss.core.storage import get_shared_storage
 from truss.workflows.agent_workflow import TemporalAgentExecutionWorkflow
 
-# ---------------------------------------------------------------------------
-# Helper
-# ---------------------------------------------------------------------------
-
-
-def _collect_storage_activity_fns(svc: StorageActivities) -> Sequence[Callable[..., Any]]:
-    """Return bound *activity* functions declared on *StorageActivities* instance."""
-
-    return [
-        svc.create_run,
-        svc.create_run_step,
-        svc.get_run_memory,
-        svc.load_agent_config,
-        svc.finalize_run,
-    ]
-
+logger = logging.getLogger("truss.worker")
 
 # ---------------------------------------------------------------------------
 # Main entry-point
@@ -55,49 +49,97 @@ def _collect_storage_activity_fns(svc: StorageActivities) -> Sequence[Callable[.
 async def main() -> None:  # noqa: D401 – imperative mood
     """Bootstrap and run the Temporal worker indefinitely."""
 
+    # Configure logging once for the process.  %s-style deferred formatting
+    # means suppressed levels never build their message strings, and flush
+    # cadence is left to the handler instead of a forced flush per line.
+    logging.basicConfig(
+        level=os.getenv("TRUSS_LOG_LEVEL", "INFO"),
+        format="%(asctime)s %(name)s %(message)s",
+    )
+
     # ------------------------------------------------------------------
     # Configuration via env vars (see module docstring)
     # ------------------------------------------------------------------
-    db_url = os.getenv("DATABASE_URL", "sqlite:///truss.db")
     temporal_address = os.getenv("TEMPORAL_URL", "localhost:7233")
     task_queue = os.getenv("TEMPORAL_TASK_QUEUE", "truss-agent-queue")
 
     # ------------------------------------------------------------------
     # Initialise shared dependencies
     # ------------------------------------------------------------------
-    storage = PostgresStorage.from_database_url(db_url)
+    # The one storage (engine/pool) for the whole process – the LLM and tool
+    # activity modules resolve the same instance, so warmup below covers
+    # every in-process consumer and concurrency limits are sized against a
+    # single pool.
+    storage = get_shared_storage()
+    # Seed the connection pool up front so the first workflow's activities
+    # don't each pay TCP/TLS connection setup on checkout.
+    await asyncio.to_thread(storage.warmup)
     storage_activities = StorageActivities(storage)
 
     # ------------------------------------------------------------------
     # Connect Temporal client
     # ------------------------------------------------------------------
-    print(f"[worker] Connecting to Temporal at {temporal_address}…", flush=True)
-    client = await Client.connect(temporal_address)
+    logger.info("Connecting to Temporal at %s", temporal_address)
+    client = await Client.connect(temporal_address, data_converter=orjson_data_converter)
 
     # ------------------------------------------------------------------
     # Register worker with workflows and activities
     # ------------------------------------------------------------------
     activities = [
-        *_collect_storage_activity_fns(storage_activities),
+        *(getattr(storage_activities, name) for name in StorageActivities.__activities__),
         llm_activity,
         execute_tool_activity,
+        execute_tools_and_persist,
     ]
 
+    # ------------------------------------------------------------------
+    # Concurrency limits – tuned to the host instead of SDK defaults.
+    # Storage activities are DB-bound, so activity concurrency defaults to
+    # whichever is smaller of the DB pool size and 4x the core count: the
+    # pool is never oversubscribed and queue depth stays bounded.
+    # ------------------------------------------------------------------
+    db_pool_size = int(os.getenv("TRUSS_DB_POOL_SIZE", "20"))
+    max_concurrent_activities = int(
+        os.getenv(
+            "TRUSS_MAX_CONCURRENT_ACTIVITIES",
+            str(min(db_pool_size, (os.cpu_count() or 1) * 4)),
+        )
+    )
+    max_concurrent_workflow_tasks = int(
+        os.getenv("TRUSS_MAX_CONCURRENT_WORKFLOW_TASKS", "100")
+    )
+    max_cached_workflows = int(os.getenv("TRUSS_MAX_CACHED_WORKFLOWS", "1000"))
+
     worker = Worker(
         client,
         task_queue=task_queue,
         workflows=[TemporalAgentExecutionWorkflow],
         activities=activities,
+        max_concurrent_activities=max_concurrent_activities,
+        max_concurrent_workflow_tasks=max_concurrent_workflow_tasks,
+        max_cached_workflows=max_cached_workflows,
     )
 
-    print(
-        f"[worker] Starting worker polling queue '{task_queue}'."
-        " Press Ctrl+C to exit.",
-        flush=True,
-    )
+    logger.info("Starting worker polling queue '%s'. Press Ctrl+C to exit.", task_queue)
 
-    await worker.run()
+    try:
+        await worker.run()
+    finally:
+        # The LLM and tool activities share process-wide Redis/HTTP clients;
+        # tear them down with the worker rather than per activity invocation.
+        await close_redis_client()
+        await close_http_client()
 
 
 if __name__ == "__main__":  # pragma: no cover – script entry
+    # libuv-backed event loop: noticeably higher I/O throughput for the
+    # gRPC-polling / DB-bound workload of this worker.  Soft dependency –
+    # fall back to the stdlib loop where uvloop is unavailable (e.g. Windows).
+    try:
+        import uvloop
+
+        uvloop.install()
+    except ImportError:
+        pass
+
     asyncio.run(main()) 
@@ -7,15 +7,41 @@ structure, signal/query handlers, and state variables.  Functional logic
 will be implemented in subsequent subtasks.
 """
 
+import asyncio
 from typing import Optional
 from datetime import timedelta
-from uuid import UUID
 
 from temporalio import workflow
 from temporalio.exceptions import ApplicationError
 from temporalio.common import RetryPolicy
 
-from truss.data_models import AgentWorkflowInput, AgentWorkflowOutput, Message, ToolCallResult  # placeholders until full impl
+from truss.data_models import (
+    AgentConfig,
+    AgentWorkflowInput,
+    AgentWorkflowOutput,
+    Message,
+    MessagesRef,
+    ToolCallResult,
+)
+
+# ---------------------------------------------------------------------------
+# Activity options – RetryPolicy/timedelta instances are immutable, so build
+# them once at import time instead of re-allocating per execution/iteration.
+# ---------------------------------------------------------------------------
+_DEFAULT_RETRY = RetryPolicy(maximum_attempts=3)
+_LLM_RETRY = RetryPolicy(maximum_attempts=5)
+_FINALIZE_RETRY = RetryPolicy(maximum_attempts=10)
+
+_ACTIVITY_TIMEOUT = timedelta(seconds=10)
+_MEMORY_TIMEOUT = timedelta(seconds=15)
+_LLM_TIMEOUT = timedelta(minutes=3)
+_TOOL_TIMEOUT = timedelta(minutes=1)
+_FINALIZE_TIMEOUT = timedelta(seconds=30)
+
+# Continue-as-new threshold – well under Temporal's 50K-event / ~50MB history
+# hard limits, so long reasoning loops compact their history instead of
+# accreting events (and replay cost) until the server kills the workflow.
+_HISTORY_COMPACT_THRESHOLD = 2000
 
 
 @workflow.defn
@@ -32,6 +58,14 @@ class TemporalAgentExecutionWorkflow:  # noqa: WPS110 – name specified in HLD/
 
         # Internal trackers – populated during execution
         self._run_id: Optional[str] = None  # Will be populated when run created
+        # Append-only cursor into the session's step stream.  The workflow
+        # only tracks *how many* messages exist – the LLM activity
+        # dereferences a MessagesRef handle against storage itself, so the
+        # conversation content never rides through workflow payloads.
+        self._memory_cursor: int = 0
+        # Agent configuration – resolved once per execution and reused by
+        # every loop iteration (it cannot change mid-run).
+        self._agent_config: Optional[AgentConfig] = None
 
     # ------------------------------------------------------------------
     # Signal handlers (mutate workflow state)
@@ -68,14 +102,17 @@ class TemporalAgentExecutionWorkflow:  # noqa: WPS110 – name specified in HLD/
         # ------------------------------------------------------------------
         self.current_status = "initialising"
 
-        # Convert session_id (str) to UUID if required – Temporal signals/inputs
-        # prefer simple JSON-serialisable types, so PRD uses strings.
-        try:
-            session_uuid = UUID(str(input.session_id))
-        except ValueError as exc:  # pragma: no cover – invalid caller payload
-            raise ApplicationError("Invalid session_id UUID string", non_retryable=True) from exc
+        # session_id is declared as UUID on AgentWorkflowInput, so pydantic has
+        # already parsed/validated it when Temporal deserialised the payload –
+        # no per-execution re-parsing needed here.
+        session_uuid = input.session_id
 
-        default_retry = RetryPolicy(maximum_attempts=3)
+        # Short DB activities (run init, memory tail fetch, finalisation) run
+        # as *local* activities: they execute in the worker process without a
+        # task-queue dispatch, so each saves an RPC round-trip and three
+        # history events.  Their handlers are simple idempotent-enough DB
+        # statements and must stay deterministic under local-activity retry.
+        # Long-running LLM/tool activities stay on the task queue.
 
         # We wrap the *entire* execution flow in a try/except/finally so we can
         # guarantee a *FinalizeRun* activity executes exactly once regardless
@@ -84,78 +121,130 @@ class TemporalAgentExecutionWorkflow:  # noqa: WPS110 – name specified in HLD/
         run_id = None  # will be assigned after CreateRun succeeds
         final_status: str = "errored"  # pessimistic default
         error_message: str | None = None
+        continued_as_new = False
+        needs_finalize = True  # cleared when the happy path finalises in-line
 
         try:
-            # ------------------------------------------------------------------
-            # 2. Persist new *Run* row
-            # ------------------------------------------------------------------
-            run_id = await workflow.execute_activity(
-                "CreateRun",
-                args=[session_uuid],
-                start_to_close_timeout=timedelta(seconds=10),
-                retry_policy=default_retry,
-            )
-
-            # ------------------------------------------------------------------
-            # 3. Persist initial user message as *RunStep*
-            # ------------------------------------------------------------------
-            await workflow.execute_activity(
-                "CreateRunStep",
-                args=[run_id, input.user_message],
-                start_to_close_timeout=timedelta(seconds=10),
-                retry_policy=default_retry,
-            )
+            if input.resume_run_id is not None:
+                # Continue-as-new resume: the run and its messages already
+                # exist – adopt the run and let the first GetRunMemorySince
+                # (cursor 0) catch the cursor up with the step stream.
+                run_id = input.resume_run_id
+            else:
+                # ------------------------------------------------------------------
+                # 2. Persist new *Run* row + initial user message in one activity
+                # ------------------------------------------------------------------
+                # One fused activity (single DB transaction) instead of the former
+                # sequential CreateRun → CreateRunStep pair: half the scheduling
+                # latency and no window where a run exists without its message.
+                run_id = await workflow.execute_local_activity(
+                    "CreateRunWithInitialStep",
+                    args=(session_uuid, input.user_message),
+                    start_to_close_timeout=_ACTIVITY_TIMEOUT,
+                    retry_policy=_DEFAULT_RETRY,
+                )
 
             # Store run identifier for later workflow steps
             self._run_id = str(run_id)
 
             # ------------------------------------------------------------------
-            # 4. Main reasoning loop – delegate heavy lifting to activities
+            # 4. Resolve agent configuration – once per execution
             # ------------------------------------------------------------------
-            # NOTE: For now we do **not** load the AgentConfig because the session ->
-            # agent mapping activity has not yet been implemented (future sub-task).
-            # We simply forward ``None`` which is accepted by the stubbed
-            # ``LLMStreamPublish`` activity used in unit-tests.  A real implementation
-            # will supply the actual AgentConfig instance.
-            agent_config = None  # type: ignore[assignment]
+            # The config is immutable for the lifetime of a run, so cache it on
+            # the workflow instance instead of refetching per loop iteration
+            # (the activity returns None when the session has no known config,
+            # which downstream code tolerates).
+            if self._agent_config is None:
+                self._agent_config = await workflow.execute_local_activity(
+                    "ResolveAgentConfig",
+                    args=(session_uuid,),
+                    start_to_close_timeout=_ACTIVITY_TIMEOUT,
+                    retry_policy=_DEFAULT_RETRY,
+                )
+            agent_config = self._agent_config
 
             self.current_status = "thinking"
 
+            # Handle for a memory fetch started speculatively while the tool
+            # batch of the previous iteration was still running.
+            memory_prefetch = None
+
             while True:
                 # --------------------------------------------------------------
                 # Cancellation check – honour external signal requests
                 # --------------------------------------------------------------
                 if self.cancellation_requested:
-                    raise ApplicationError("Workflow cancelled via signal", non_retryable=True)
+                    raise asyncio.CancelledError()
 
                 # --------------------------------------------------------------
-                # 4.1 Fetch conversation memory for this session
+                # History compaction – every activity adds events, so a long
+                # reasoning loop would otherwise creep towards Temporal's
+                # history limits and pay ever-growing replay cost.  Hand the
+                # run over to a fresh incarnation that re-adopts it; memory is
+                # rebuilt from the persisted step stream on first fetch.
                 # --------------------------------------------------------------
-                memory = await workflow.execute_activity(
-                    "GetRunMemory",
-                    args=[session_uuid],
-                    start_to_close_timeout=timedelta(seconds=15),
-                    retry_policy=default_retry,
-                )
+                if workflow.info().get_current_history_length() > _HISTORY_COMPACT_THRESHOLD:
+                    continued_as_new = True
+                    workflow.continue_as_new(
+                        AgentWorkflowInput.model_construct(
+                            session_id=session_uuid,
+                            user_message=None,
+                            run_id=None,
+                            resume_run_id=run_id,
+                        )
+                    )
 
-                # Construct prompt – prepend system prompt if we have one
-                messages_for_llm: list[Message] = []
-                if agent_config is not None and getattr(agent_config, "system_prompt", None):
-                    messages_for_llm.append(
-                        Message(role="system", content=getattr(agent_config, "system_prompt"))
+                # --------------------------------------------------------------
+                # 4.1 Advance the cursor past any *new* messages – reuse the
+                #     prefetched result when the previous iteration overlapped
+                #     the fetch with its tool batch.
+                # --------------------------------------------------------------
+                if memory_prefetch is None:
+                    new_messages = await workflow.execute_local_activity(
+                        "GetRunMemorySince",
+                        args=(session_uuid, self._memory_cursor),
+                        start_to_close_timeout=_MEMORY_TIMEOUT,
+                        retry_policy=_DEFAULT_RETRY,
                     )
-                messages_for_llm.extend(memory.messages)  # type: ignore[arg-type]
+                else:
+                    new_messages = await memory_prefetch
+                    memory_prefetch = None
+                self._memory_cursor += len(new_messages)
 
                 # --------------------------------------------------------------
                 # 4.2 Invoke LLM activity with streaming & durability guarantees
                 # --------------------------------------------------------------
+                # The conversation is referenced by handle, not by value: the
+                # activity re-reads the pinned prefix (plus the configured
+                # system prompt) from storage on the worker, so this payload
+                # stays O(1) however long the conversation grows.
+                # result_type matters here: name-based invocation gives the
+                # SDK no return annotation to decode against, and this is the
+                # one activity result whose attributes the workflow reads –
+                # without it the payload arrives as a plain dict and the
+                # tool_calls access below fails the workflow task.  The other
+                # activity results (run_id, message/result lists) are only
+                # handled opaquely.
                 assistant_response = await workflow.execute_activity(
                     "LLMStreamPublish",
-                    args=[agent_config, messages_for_llm, session_uuid, run_id],
-                    start_to_close_timeout=timedelta(minutes=3),
-                    retry_policy=RetryPolicy(maximum_attempts=5),
+                    args=(
+                        agent_config,
+                        MessagesRef.model_construct(
+                            session_id=session_uuid, up_to_seq=self._memory_cursor
+                        ),
+                        session_uuid,
+                        run_id,
+                    ),
+                    result_type=Message,
+                    start_to_close_timeout=_LLM_TIMEOUT,
+                    retry_policy=_LLM_RETRY,
                 )
 
+                # The LLM activity persists exactly one assistant RunStep;
+                # count it so the next fetch skips a row we already know about
+                # (and never waits on the activity's deferred DB write landing).
+                self._memory_cursor += 1
+
                 # --------------------------------------------------------------
                 # 4.3 Decision – final response vs tool delegation
                 # --------------------------------------------------------------
@@ -163,55 +252,90 @@ class TemporalAgentExecutionWorkflow:  # noqa: WPS110 – name specified in HLD/
                     # No tool calls requested → finished.
                     self.current_status = "completed"
                     final_status = "completed"
-                    return AgentWorkflowOutput(
+                    # Finalise in-line on the happy path rather than falling
+                    # through to the catch-all in ``finally`` – the flag keeps
+                    # that block as a safety net for error/cancel exits only,
+                    # so a successful run never schedules a redundant check.
+                    await workflow.execute_local_activity(
+                        "FinalizeRun",
+                        args=(run_id, "completed", None),
+                        start_to_close_timeout=_FINALIZE_TIMEOUT,
+                        retry_policy=_FINALIZE_RETRY,
+                    )
+                    needs_finalize = False
+                    # Trusted happy path: run_id came from our own activity and
+                    # assistant_response was validated when the LLM activity's
+                    # result payload was deserialised – model_construct skips
+                    # re-validating the nested Message tree.
+                    return AgentWorkflowOutput.model_construct(
                         run_id=run_id,
                         status="completed",
                         final_message=assistant_response,
                     )
 
                 # --------------------------------------------------------------
-                # 4.4 Execute requested tools in *parallel*
+                # 4.4 Execute requested tools + persist their results – one
+                #     batched activity for the whole turn.  The activity runs
+                #     the tools concurrently in-process and bulk-inserts all
+                #     tool RunSteps, so history/task-queue cost is O(1) per
+                #     turn instead of O(2N) for N tool calls.
                 # --------------------------------------------------------------
-                import asyncio  # local import to keep top-level clean & deterministic
-
-                if assistant_response.tool_calls is None:  # pragma: no cover – safety guard
-                    # Should not happen due to check above, but keep workflow safe.
-                    continue
-
                 self.current_status = f"executing {len(assistant_response.tool_calls)} tools"
 
-                tool_tasks = [
-                    workflow.execute_activity(
-                        "ExecuteTool",
-                        args=[tool_call],
-                        start_to_close_timeout=timedelta(minutes=1),
-                        retry_policy=default_retry,
-                    )
-                    for tool_call in assistant_response.tool_calls
-                ]
-
-                tool_results: list[ToolCallResult] = list(await asyncio.gather(*tool_tasks))
+                # Overlap the next memory fetch with the tool batch.  The
+                # batch persists exactly len(tool_calls) rows which we mirror
+                # locally below, so the prefetch cursor already accounts for
+                # them and only ever returns externally-written rows.
+                memory_prefetch = workflow.start_local_activity(
+                    "GetRunMemorySince",
+                    args=(session_uuid, self._memory_cursor + len(assistant_response.tool_calls)),
+                    start_to_close_timeout=_MEMORY_TIMEOUT,
+                    retry_policy=_DEFAULT_RETRY,
+                )
 
-                # --------------------------------------------------------------
-                # 4.5 Persist tool results as *tool* role RunSteps
-                # --------------------------------------------------------------
-                for res in tool_results:
-                    tool_msg = Message(role="tool", content=res.content, tool_call_id=res.tool_call_id)
-
-                    await workflow.execute_activity(
-                        "CreateRunStep",
-                        args=[run_id, tool_msg],
-                        start_to_close_timeout=timedelta(seconds=10),
-                        retry_policy=default_retry,
+                # Race the batch against the cancellation signal: without
+                # this, a signal arriving mid-batch would sit unserviced
+                # until every tool finished or timed out.
+                tool_task = asyncio.ensure_future(
+                    workflow.start_activity(
+                        "ExecuteToolsAndPersist",
+                        args=(run_id, assistant_response.tool_calls),
+                        start_to_close_timeout=_TOOL_TIMEOUT,
+                        retry_policy=_DEFAULT_RETRY,
                     )
-
-                # Loop continues – with new memory containing tool results added
+                )
+                cancel_task = asyncio.ensure_future(
+                    workflow.wait_condition(lambda: self.cancellation_requested)
+                )
+                done, _pending = await asyncio.wait(
+                    {tool_task, cancel_task}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if cancel_task in done and tool_task not in done:
+                    tool_task.cancel()
+                    raise asyncio.CancelledError()
+                cancel_task.cancel()
+                tool_results: list[ToolCallResult] = tool_task.result()
+
+                # Count the persisted tool RunSteps as well – the next
+                # GetRunMemorySince then only returns rows written by someone
+                # other than this workflow (normally none).
+                self._memory_cursor += len(tool_results)
+
+                # Loop continues – with the tool results already appended
+
+        except asyncio.CancelledError:
+            # Signal-requested (or server-initiated) cancellation – Temporal
+            # records CancelledError as a cancellation in history, so no
+            # custom error type or message inspection is needed.
+            error_message = "Workflow cancelled via signal"
+            final_status = "cancelled"
+            raise
 
         except ApplicationError as exc:
-            # Includes our custom cancellation exception and non-retryable errors
+            # Non-retryable application failures raised by activities
             error_message = str(exc)
-            final_status = "cancelled" if "cancelled" in error_message.lower() else "errored"
-            raise  # surface to caller so Temporal records failure/cancellation
+            final_status = "errored"
+            raise  # surface to caller so Temporal records the failure
 
         except Exception as exc:  # noqa: BLE001 – catch-all to record status
             error_message = str(exc)
@@ -219,21 +343,21 @@ class TemporalAgentExecutionWorkflow:  # noqa: WPS110 – name specified in HLD/
             raise
 
         finally:
-            # Ensure we attempt to finalise run *once* if run_id is available.
-            if run_id is not None:
+            # Ensure we attempt to finalise run *once* if run_id is available
+            # and the happy path did not already do so in-line.  A
+            # continue-as-new exit is a hand-over, not a terminal state – the
+            # next incarnation owns finalisation.
+            if run_id is not None and needs_finalize and not continued_as_new:
                 try:
-                    await workflow.execute_activity(
+                    await workflow.execute_local_activity(
                         "FinalizeRun",
-                        args=[run_id, final_status, error_message],
-                        start_to_close_timeout=timedelta(seconds=30),
-                        retry_policy=RetryPolicy(maximum_attempts=10),
+                        args=(run_id, final_status, error_message),
+                        start_to_close_timeout=_FINALIZE_TIMEOUT,
+                        retry_policy=_FINALIZE_RETRY,
                     )
                 except Exception:  # pragma: no cover – log but do not mask
                     # We cannot call activity.logger from workflow context; instead rely on Temporal stack trace.
                     pass
 
-        # This line is only reached if the *return* path above was executed.
-        # For mypy completeness.
-        # pragma: no cover
-        assert run_id is not None
-        return AgentWorkflowOutput(run_id=run_id, status=final_status, error=error_message) 
+        # Unreachable: the try block only exits via the return inside the loop
+        # or by raising, and both except arms re-raise. 